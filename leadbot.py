@@ -4,7 +4,13 @@ import os
 import sys
 import time
 import json
+import hashlib
+import io
+import queue
+import sqlite3
 import threading
+from collections import OrderedDict, deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
 import pandas as pd
@@ -12,8 +18,10 @@ import requests
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support.ui import WebDriverWait, Select
+from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import SessionNotCreatedException
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.edge.service import Service as EdgeService
@@ -35,6 +43,14 @@ except ImportError:
 actions_log = []
 PREFS_FILE = os.path.join('configs', 'last_session.json')
 LLM_CONFIG_FILE = os.path.join('configs', 'llm_config.json')
+LLM_CACHE_FILE = os.path.join('configs', 'llm_cache.json')
+LLM_CACHE_TTL = 7 * 24 * 3600  # seconds
+LLM_CACHE_MAX_ENTRIES = 5000
+RESEARCH_CACHE_FILE = os.path.join('configs', 'research_cache.json')
+RESEARCH_CACHE_TTL = 30 * 24 * 3600  # seconds
+RESEARCH_CACHE_MAX_ENTRIES = 2000
+CACHE_FLUSH_INTERVAL = 5.0  # seconds between cache file rewrites (pending entries are flushed on exit)
+BROWSER_DISCOVERY_FILE = os.path.join('configs', 'browser_discovery.json')
 
 # -------------------------
 # LLM Integration
@@ -66,65 +82,697 @@ def save_llm_config(config):
             json.dump(config, f, indent=2)
     except Exception as e:
         print(f"Error saving LLM config: {e}")
+    LLM_SERVICE.invalidate()
 
-def load_processing_status(site_name):
-    """Load processing status for CSV rows."""
+class LLMInferenceService:
+    """
+    Process-wide LLM access point.
+
+    Holds the loaded LLM config (re-read only when llm_config.json changes on
+    disk), one OpenAI client backed by a pooled keep-alive HTTP client (rebuilt
+    only when the API key or base URL changes), and per-call latency samples.
+    """
+    def __init__(self, config_path=LLM_CONFIG_FILE):
+        self.config_path = config_path
+        self._lock = threading.Lock()
+        self._config = None
+        self._config_mtime = None
+        self._client = None
+        self._client_key = None
+        self.latencies = deque(maxlen=1000)  # (label, seconds)
+
+    def invalidate(self):
+        """Force the config (and client if credentials changed) to reload on next use."""
+        with self._lock:
+            self._config = None
+            self._config_mtime = None
+
+    def config(self):
+        """Return the current LLM config; a single stat() when unchanged."""
+        try:
+            mtime = os.path.getmtime(self.config_path)
+        except OSError:
+            mtime = None
+        with self._lock:
+            if self._config is None or mtime != self._config_mtime:
+                self._config = load_llm_config()
+                self._config_mtime = mtime
+            return self._config
+
+    def client(self):
+        """Return the shared OpenAI client for the current credentials."""
+        config = self.config()
+        key = (config.get('api_key'), config.get('base_url'))
+        with self._lock:
+            if self._client is None or key != self._client_key:
+                http_client = None
+                try:
+                    import httpx
+                    http_client = httpx.Client(
+                        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+                        timeout=60,
+                    )
+                except ImportError:
+                    pass  # openai falls back to its own default client
+                kwargs = {'api_key': key[0], 'base_url': key[1]}
+                if http_client is not None:
+                    kwargs['http_client'] = http_client
+                self._client = OpenAI(**kwargs)
+                self._client_key = key
+            return self._client
+
+    def chat(self, label, **kwargs):
+        """Create a chat completion with the configured model and record its latency."""
+        config = self.config()
+        kwargs.setdefault('model', config.get('model', 'gpt-4o-mini'))
+        start = time.time()
+        try:
+            return self.client().chat.completions.create(**kwargs)
+        finally:
+            self.latencies.append((label, time.time() - start))
+
+    def latency_stats(self):
+        """Human-readable latency summary per call label, or '' if no calls were made."""
+        by_label = {}
+        for label, seconds in list(self.latencies):
+            by_label.setdefault(label, []).append(seconds)
+        parts = []
+        for label, samples in sorted(by_label.items()):
+            samples.sort()
+            avg = sum(samples) / len(samples)
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            parts.append(f"{label}: {len(samples)} calls, avg {avg * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, max {samples[-1] * 1000:.0f} ms")
+        return "; ".join(parts)
+
+LLM_SERVICE = LLMInferenceService()
+
+# -------------------------
+# Run Store (processing status)
+# -------------------------
+
+# Processing status lives in a per-site SQLite database (configs/{site}_runs.db,
+# WAL mode, one transaction per row). Every CSV row gets a record once the CSV
+# size is known (ensure_rows, checked once per CSV size per process), so "next N
+# pending" is an index range scan over open rows, and trigger-maintained
+# counters make summary counts O(1).
+# Older {site}_processing_status.json snapshots (and .jsonl journals) are
+# imported automatically the first time a site's store is opened.
+
+RUN_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    row_idx INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    error TEXT,
+    timestamp TEXT,
+    updated_at REAL,
+    duration REAL,
+    row_hash TEXT,
+    worker INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_rows_open ON rows(row_idx) WHERE status != 'completed';
+DROP INDEX IF EXISTS idx_rows_status_updated;
+CREATE INDEX IF NOT EXISTS idx_rows_status_row ON rows(status, row_idx);
+CREATE TABLE IF NOT EXISTS status_counts (status TEXT PRIMARY KEY, n INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TRIGGER IF NOT EXISTS trg_rows_insert AFTER INSERT ON rows BEGIN
+    INSERT INTO status_counts(status, n) VALUES (new.status, 1)
+        ON CONFLICT(status) DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rows_update AFTER UPDATE OF status ON rows
+WHEN old.status != new.status BEGIN
+    UPDATE status_counts SET n = n - 1 WHERE status = old.status;
+    INSERT INTO status_counts(status, n) VALUES (new.status, 1)
+        ON CONFLICT(status) DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rows_delete AFTER DELETE ON rows BEGIN
+    UPDATE status_counts SET n = n - 1 WHERE status = old.status;
+END;
+"""
+
+def _legacy_status_paths(site_name):
+    """Return (snapshot_path, journal_path) of pre-SQLite processing status files."""
+    base = os.path.join('configs', f'{site_name}_processing_status')
+    return base + '.json', base + '.jsonl'
+
+def _load_legacy_status(site_name):
+    """Read a legacy JSON snapshot + JSONL journal into a status dict."""
+    snapshot_path, journal_path = _legacy_status_paths(site_name)
+    status = {}
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, 'r') as f:
+            status = json.load(f)
+    if os.path.exists(journal_path):
+        with open(journal_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn final line from a crash mid-write
+                status[str(record['row'])] = record['entry']
+    return status
+
+def row_hash(row):
+    """Short content hash of a CSV row (detects rows that changed between runs)."""
+    values = {str(k): ('' if pd.isna(v) else str(v)) for k, v in row.items()}
+    return hashlib.sha1(json.dumps(values, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+class RunStore:
+    """SQLite-backed processing status for one site. Safe to share between threads."""
+    def __init__(self, site_name):
+        os.makedirs('configs', exist_ok=True)
+        self.site_name = site_name
+        self.path = os.path.join('configs', f'{site_name}_runs.db')
+        self._lock = threading.Lock()
+        self._ensured = 0  # Every row_idx below this has a record
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(RUN_STORE_SCHEMA)
+        self._import_legacy_status()
+
+    def _import_legacy_status(self):
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+                return
+            try:
+                legacy = _load_legacy_status(self.site_name)
+            except Exception as e:
+                print(f"Error importing legacy processing status: {e}")
+                legacy = {}
+            self._conn.execute('BEGIN')
+            for key, entry in legacy.items():
+                self._upsert(int(key), entry.get('status', 'unknown'), entry.get('error'),
+                             entry.get('timestamp'), None, None, entry.get('worker'))
+            self._conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('legacy_imported', ?)", (str(len(legacy)),))
+            self._conn.execute('COMMIT')
+            if legacy:
+                print(f"Imported {len(legacy)} row statuses from legacy status files for '{self.site_name}'")
+
+    def _upsert(self, row_idx, status, error, timestamp, duration, row_hash_value, worker):
+        self._conn.execute(
+            """INSERT INTO rows(row_idx, status, error, timestamp, updated_at, duration, row_hash, worker, attempts)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+               ON CONFLICT(row_idx) DO UPDATE SET
+                   status = excluded.status, error = excluded.error, timestamp = excluded.timestamp,
+                   updated_at = excluded.updated_at, duration = excluded.duration,
+                   row_hash = COALESCE(excluded.row_hash, rows.row_hash), worker = excluded.worker,
+                   attempts = rows.attempts + 1""",
+            (row_idx, status, error, timestamp, time.time(), duration, row_hash_value, worker)
+        )
+
+    def record(self, row_idx, status, error=None, duration=None, row_hash=None, worker=None):
+        """Commit one row's result (single transaction)."""
+        with self._lock:
+            self._upsert(int(row_idx), status, error, time.strftime('%Y-%m-%d %H:%M:%S'), duration, row_hash, worker)
+
+    def ensure_rows(self, total_rows):
+        """Create 'pending' records for CSV rows not yet known to the store."""
+        with self._lock:
+            if total_rows <= self._ensured:
+                return
+            known = self._conn.execute('SELECT COUNT(*) FROM rows WHERE row_idx >= 0 AND row_idx < ?', (total_rows,)).fetchone()[0]
+            if known < total_rows:
+                # Fills gaps too (legacy imports, aborted runs), not just the tail
+                self._conn.execute('BEGIN')
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO rows(row_idx, status) VALUES (?, 'pending')",
+                    ((i,) for i in range(total_rows))
+                )
+                self._conn.execute('COMMIT')
+            self._ensured = total_rows
+
+    def next_pending(self, total_rows, limit):
+        """Return the first `limit` row indices (< total_rows) that are not completed."""
+        self.ensure_rows(total_rows)
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT row_idx FROM rows WHERE status != 'completed' AND row_idx < ? ORDER BY row_idx LIMIT ?",
+                (total_rows, limit)
+            )
+            return [r[0] for r in cur]
+
+    def completed_between(self, start, stop):
+        """Set of completed row indices in [start, stop)."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT row_idx FROM rows WHERE status = 'completed' AND row_idx >= ? AND row_idx < ?", (start, stop)
+            )
+            return {r[0] for r in cur}
+
+    def summary(self):
+        """Return {status: count} from the trigger-maintained counters."""
+        with self._lock:
+            return {status: n for status, n in self._conn.execute('SELECT status, n FROM status_counts WHERE n > 0')}
+
+    def completed_count(self, total_rows=None):
+        """Completed rows, optionally limited to indices < total_rows."""
+        completed = self.summary().get('completed', 0)
+        if total_rows is not None:
+            with self._lock:
+                beyond = self._conn.execute(
+                    "SELECT COUNT(*) FROM rows WHERE status = 'completed' AND row_idx >= ?", (total_rows,)
+                ).fetchone()[0]
+            completed -= beyond
+        return completed
+
+    def rows(self, statuses=('completed', 'failed'), limit=None):
+        """Return status entries (dicts) for rows in the given statuses, ordered by row (first `limit` only)."""
+        placeholders = ','.join('?' * len(statuses))
+        with self._lock:
+            cur = self._conn.execute(
+                f"SELECT row_idx, status, error, timestamp, duration, row_hash, worker, attempts FROM rows "
+                f"WHERE status IN ({placeholders}) ORDER BY row_idx LIMIT ?",
+                tuple(statuses) + (-1 if limit is None else limit,)
+            )
+            result = []
+            for row_idx, status, error, timestamp, duration, rhash, worker, attempts in cur:
+                entry = {'row_idx': row_idx, 'status': status, 'timestamp': timestamp, 'row_number': row_idx + 1}
+                if error:
+                    entry['error'] = error
+                if duration is not None:
+                    entry['duration'] = duration
+                if rhash:
+                    entry['row_hash'] = rhash
+                if worker is not None:
+                    entry['worker'] = worker
+                entry['attempts'] = attempts
+                result.append(entry)
+            return result
+
+    def checkpoint(self):
+        """Fold the WAL back into the main database file."""
+        with self._lock:
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.execute('DELETE FROM rows')
+            self._conn.execute('DELETE FROM status_counts')
+            self._conn.execute('COMMIT')
+            self._ensured = 0
+
+_run_stores = {}
+_run_stores_lock = threading.Lock()
+
+STATUS_VIEW_LIMIT = 500  # Rows listed by the status viewer (failed rows first)
+
+def get_run_store(site_name):
+    """Return the shared RunStore for a site (opened once per process)."""
+    with _run_stores_lock:
+        store = _run_stores.get(site_name)
+        if store is None:
+            store = RunStore(site_name)
+            _run_stores[site_name] = store
+        return store
+
+def record_row_status(site_name, row_idx, entry):
+    """Commit one row's status (atomic per row)."""
     try:
-        status_path = os.path.join('configs', f'{site_name}_processing_status.json')
-        if os.path.exists(status_path):
-            with open(status_path, 'r') as f:
-                return json.load(f)
-        return {}
+        get_run_store(site_name).record(
+            row_idx, entry['status'], error=entry.get('error'), duration=entry.get('duration'),
+            row_hash=entry.get('row_hash'), worker=entry.get('worker')
+        )
     except Exception as e:
-        print(f"Error loading processing status: {e}")
-        return {}
+        print(f"Error recording processing status: {e}")
 
-def save_processing_status(site_name, status):
-    """Save processing status for CSV rows."""
+def compact_processing_status(site_name):
+    """Checkpoint the status database's write-ahead log."""
     try:
-        status_path = os.path.join('configs', f'{site_name}_processing_status.json')
-        os.makedirs('configs', exist_ok=True)
-        with open(status_path, 'w') as f:
-            json.dump(status, f, indent=2)
+        get_run_store(site_name).checkpoint()
     except Exception as e:
-        print(f"Error saving processing status: {e}")
+        print(f"Error compacting processing status: {e}")
+
+def clear_processing_status(site_name):
+    """Delete all processing status for a site (including legacy files)."""
+    get_run_store(site_name).clear()
+    for path in _legacy_status_paths(site_name):
+        if os.path.exists(path):
+            os.remove(path)
+
+# -------------------------
+# CSV Row Source
+# -------------------------
+
+# Lead files can be multi-GB exports. CSVRowSource never loads the whole file:
+# it keeps a sparse byte-offset index (one offset every CSV_INDEX_STEP rows)
+# persisted under configs/, so counting rows and jumping to pending rows costs
+# one index load plus a short scan from the nearest checkpoint. The index is
+# rebuilt whenever the CSV's size or mtime changes.
+CSV_INDEX_STEP = 1000
+CSV_CHUNK_ROWS = 500
+
+class CSVRowSource:
+    """Lazy, indexed access to the rows of a CSV file."""
+    def __init__(self, csv_file, step=CSV_INDEX_STEP):
+        self.csv_file = csv_file
+        self.step = step
+        self._index = None
+        self._columns = None
+        self._header = None
+
+    @property
+    def index_path(self):
+        digest = hashlib.sha1(os.path.abspath(self.csv_file).encode('utf-8')).hexdigest()[:16]
+        return os.path.join('configs', f'csv_index_{digest}.json')
+
+    @property
+    def columns(self):
+        """Column names from the header row."""
+        if self._columns is None:
+            self._columns = pd.read_csv(self.csv_file, nrows=0).columns.tolist()
+        return self._columns
 
-def perform_web_research(query, search_api_key):
+    def __len__(self):
+        return self._load_index()['rows']
+
+    @staticmethod
+    def _read_record(f):
+        """Read one CSV record (may span lines inside quotes); skips blank lines. Returns bytes or None at EOF."""
+        parts = []
+        in_quotes = False
+        for line in iter(f.readline, b''):
+            if not parts and not line.strip(b'\r\n'):
+                continue
+            parts.append(line)
+            if line.count(b'"') % 2:
+                in_quotes = not in_quotes
+            if not in_quotes:
+                break
+        if not parts:
+            return None
+        record = b''.join(parts)
+        return record if record.endswith(b'\n') else record + b'\n'
+
+    def _read_header(self):
+        if self._header is None:
+            with open(self.csv_file, 'rb') as f:
+                header = self._read_record(f) or b''
+                self._header = (header, f.tell())
+        return self._header
+
+    def _stat_key(self):
+        st = os.stat(self.csv_file)
+        return st.st_size, st.st_mtime_ns
+
+    def _load_index(self):
+        if self._index is not None:
+            return self._index
+        size, mtime_ns = self._stat_key()
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            if (index.get('size') == size and index.get('mtime_ns') == mtime_ns
+                    and index.get('step') == self.step and index.get('path') == os.path.abspath(self.csv_file)):
+                self._index = index
+                return index
+        except (OSError, ValueError):
+            pass
+        self._index = self._build_index(size, mtime_ns)
+        return self._index
+
+    def _build_index(self, size, mtime_ns):
+        """Scan the file once, recording the byte offset of every step-th row."""
+        _, data_start = self._read_header()
+        offsets = []
+        rows = 0
+        in_quotes = False
+        pos = data_start
+        with open(self.csv_file, 'rb') as f:
+            f.seek(data_start)
+            for line in f:
+                if not in_quotes:
+                    if not line.strip(b'\r\n'):
+                        pos += len(line)
+                        continue
+                    if rows % self.step == 0:
+                        offsets.append(pos)
+                    rows += 1
+                if line.count(b'"') % 2:
+                    in_quotes = not in_quotes
+                pos += len(line)
+        index = {'path': os.path.abspath(self.csv_file), 'size': size, 'mtime_ns': mtime_ns,
+                 'step': self.step, 'rows': rows, 'offsets': offsets}
+        try:
+            os.makedirs('configs', exist_ok=True)
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"Error saving CSV row index: {e}")
+        return index
+
+    def _checkpoint(self, row_idx):
+        """Return (byte_offset, row_idx_at_offset) of the nearest checkpoint at or before row_idx."""
+        if row_idx < self.step:
+            return self._read_header()[1], 0
+        offsets = self._load_index()['offsets']
+        if not offsets:
+            return self._read_header()[1], 0
+        slot = min(row_idx // self.step, len(offsets) - 1)
+        return offsets[slot], slot * self.step
+
+    def read_rows(self, row_indices):
+        """Parse only the given rows; returns a DataFrame indexed by their original row numbers."""
+        wanted = sorted(set(int(i) for i in row_indices))
+        found = []
+        records = []
+        with open(self.csv_file, 'rb') as f:
+            current = None
+            for row_idx in wanted:
+                offset, start_idx = self._checkpoint(row_idx)
+                if current is None or current > row_idx or start_idx > current:
+                    f.seek(offset)
+                    current = start_idx
+                record = None
+                while current <= row_idx:
+                    record = self._read_record(f)
+                    if record is None:
+                        break
+                    current += 1
+                if record is None:
+                    break  # Past end of file
+                found.append(row_idx)
+                records.append(record)
+        header = self._read_header()[0]
+        if not records:
+            return pd.DataFrame(columns=pd.read_csv(io.BytesIO(header), nrows=0).columns)
+        df = pd.read_csv(io.BytesIO(header + b''.join(records)))
+        df.index = found
+        return df
+
+    def iter_chunks(self, chunksize=CSV_CHUNK_ROWS):
+        """Yield DataFrame chunks in file order (index = original row numbers)."""
+        return pd.read_csv(self.csv_file, chunksize=chunksize)
+
+# -------------------------
+# Persistent Cache
+# -------------------------
+
+class DiskCache:
+    """
+    Small persistent key/value cache stored as JSON under configs/.
+    Entries expire after ttl seconds; when more than max_entries are stored the
+    least recently used ones are evicted. Safe to share between threads.
+    New entries are written at most every flush_interval seconds; call flush()
+    before exiting to write the rest.
+    """
+    def __init__(self, path, ttl, max_entries, flush_interval=CACHE_FLUSH_INTERVAL):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries = None  # OrderedDict key -> {'value', 'ts'}, loaded lazily
+        self._dirty = False
+        self._saved_at = 0.0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # Serializes file writes (done outside _lock)
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                # Stored oldest-used first so LRU order survives restarts
+                for key, entry in data.get('entries', []):
+                    self._entries[key] = entry
+        except Exception as e:
+            print(f"Error loading cache {self.path}: {e}")
+
+    def flush(self):
+        """Write the cache file if anything changed since the last write."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                entries = list(self._entries.items())
+                self._dirty = False
+                self._saved_at = time.time()
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump({'entries': entries}, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Error saving cache {self.path}: {e}")
+
+    def get(self, key):
+        """Return cached value or None (counts a hit or a miss)."""
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry.get('ts', 0) <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry['value']
+            if entry is not None:
+                del self._entries[key]  # Expired
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._load()
+            self._entries[key] = {'value': value, 'ts': time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+            due = time.time() - self._saved_at >= self.flush_interval
+        if due:
+            self.flush()
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self.hits = self.misses = 0
+            self._dirty = True
+        self.flush()
+
+    def stats(self):
+        """Human-readable hit/miss summary for logs."""
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
+
+def cache_key(*parts):
+    """Stable hash of JSON-serializable parts (dict keys sorted)."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+LLM_CACHE = DiskCache(LLM_CACHE_FILE, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES)
+
+def _normalize_row_for_cache(csv_row_data):
+    """Normalize CSV row values (NaN -> '', trimmed strings) so equal rows hash equally."""
+    normalized = {}
+    for col, val in csv_row_data.items():
+        normalized[str(col)] = '' if pd.isna(val) else str(val).strip()
+    return normalized
+
+# -------------------------
+# Web Research
+# -------------------------
+
+RESEARCH_CACHE = DiskCache(RESEARCH_CACHE_FILE, RESEARCH_CACHE_TTL, RESEARCH_CACHE_MAX_ENTRIES)
+
+_tavily_clients = {}
+_research_locks = {}
+_research_locks_guard = threading.Lock()
+
+def _get_tavily_client(search_api_key):
+    """Return a shared TavilyClient for this API key (created once per process)."""
+    with _research_locks_guard:
+        client = _tavily_clients.get(search_api_key)
+        if client is None:
+            client = TavilyClient(api_key=search_api_key)
+            _tavily_clients[search_api_key] = client
+        return client
+
+def _search_tavily(query, search_api_key, max_results=3, content_chars=200):
+    """Run one Tavily search and format the results. Raises on API errors."""
+    response = _get_tavily_client(search_api_key).search(query, max_results=max_results)
+    
+    # Extract and format results
+    results = []
+    for item in response.get('results', []):
+        title = item.get('title', '')
+        content = item.get('content', '')
+        if title and content:
+            results.append(f"{title}: {content[:content_chars]}")
+    
+    return "\n\n".join(results) if results else None
+
+def normalize_company_name(name):
+    """Normalize a company name for cache keys ('The Acme Co., Inc.' -> 'acme')."""
+    import re
+    words = re.sub(r'[^a-z0-9 ]+', ' ', str(name).lower()).split()
+    suffixes = {'inc', 'llc', 'ltd', 'corp', 'corporation', 'co', 'company', 'incorporated', 'limited', 'plc', 'lp', 'llp'}
+    while words and words[-1] in suffixes:
+        words.pop()
+    if words and words[0] == 'the':
+        words = words[1:]
+    return ' '.join(words)
+
+def research_company(company_name, search_api_key, intent='profile'):
     """
-    Perform web search using Tavily API to gather real-time information.
+    Research a company once and reuse the result for every researchable field
+    (revenue, industry, sector) of every row mentioning the same company.
     
-    Args:
-        query: search query string
-        search_api_key: Tavily API key
+    Results are stored in RESEARCH_CACHE keyed by normalized company name and
+    query intent. Concurrent callers asking about the same company wait for a
+    single in-flight search instead of issuing duplicates.
     
     Returns:
-        str: summarized search results, or None if error
+        str: summarized search results, or None if nothing found or error
     """
-    if not TAVILY_AVAILABLE or not search_api_key:
+    if not TAVILY_AVAILABLE or not search_api_key or not company_name:
         return None
     
-    try:
-        client = TavilyClient(api_key=search_api_key)
-        response = client.search(query, max_results=3)
-        
-        # Extract and format results
-        results = []
-        for item in response.get('results', []):
-            title = item.get('title', '')
-            content = item.get('content', '')
-            if title and content:
-                results.append(f"{title}: {content[:200]}")
-        
-        return "\n\n".join(results) if results else None
-    except Exception as e:
-        print(f"Web research error: {e}")
+    normalized = normalize_company_name(company_name)
+    if not normalized:
         return None
+    key = cache_key('research', normalized, intent)
+    
+    with _research_locks_guard:
+        lock = _research_locks.setdefault(key, threading.Lock())
+    with lock:
+        cached = RESEARCH_CACHE.get(key)
+        if cached is not None:
+            print(f"    Research cache hit: {company_name} ({RESEARCH_CACHE.stats()})")
+            return cached or None
+        
+        # One combined search serves every researchable field
+        query = f"{company_name} company profile annual revenue industry sector business type"
+        print(f"    Researching: {query}")
+        try:
+            results = _search_tavily(query, search_api_key, max_results=5, content_chars=300)
+        except Exception as e:
+            print(f"Web research error: {e}")
+            return None  # Not cached so it is retried later
+        
+        # Cache empty results too so repeat rows don't search again
+        RESEARCH_CACHE.set(key, results or '')
+        return results
+
+# -------------------------
+# LLM Field Inference
+# -------------------------
 
 def infer_field_value_with_llm(field_context, csv_row_data, available_options=None):
     """
     Use LLM to intelligently infer what value should be entered into a field
     based on the CSV row data and field context.
     Optionally performs web research to find accurate information.
+    Answers are cached on disk (LLM_CACHE) keyed by the prompt inputs and model,
+    so retries, verification previews and reruns don't pay for the same call twice.
     
     Args:
         field_context: dict with 'id', 'name', 'type', 'tag', etc.
@@ -134,10 +782,110 @@ def infer_field_value_with_llm(field_context, csv_row_data, available_options=No
     Returns:
         str: suggested value, or None if LLM disabled or error
     """
-    config = load_llm_config()
+    config = LLM_SERVICE.config()
     if not config.get('enabled') or not config.get('api_key'):
         return None
     
+    key = cache_key(
+        'field',
+        config.get('model', 'gpt-4o-mini'),
+        config.get('base_url'),
+        bool(config.get('enable_search') and config.get('search_api_key')),
+        {k: field_context.get(k) for k in ('id', 'name', 'type', 'tag')},
+        _normalize_row_for_cache(csv_row_data),
+        list(available_options or []),
+    )
+    cached = LLM_CACHE.get(key)
+    if cached is not None:
+        print(f"    LLM cache hit for '{field_context.get('id', 'unknown')}' ({LLM_CACHE.stats()})")
+        return cached
+    
+    suggested_value = _infer_field_value_uncached(config, field_context, csv_row_data, available_options)
+    if suggested_value is not None:
+        LLM_CACHE.set(key, suggested_value)
+    return suggested_value
+
+LLM_SYSTEM_PROMPT = """You are a form-filling assistant for automated lead processing workflows.
+
+KEY RULES:
+- For US states: ALWAYS use 2-letter codes (CO, NY, CA, etc.) never full names
+- Match exact format of dropdown options when provided
+- When CSV data is BLANK and NO research: Return absolutely nothing (blank output)
+- For employee count WITH research: Return ONLY a number between 1-30 (e.g., "15" or "8")
+- For revenue: Extract from "$5M revenue" (return just number like "5000000")
+- Be precise and concise - return only the value, nothing else
+- NEVER output words like "empty", "blank", "none", "null" - just leave it empty
+- Consider the field ID/name to understand what data is expected"""
+
+LLM_RULES = """RULES:
+1. For STATE fields: ALWAYS use 2-letter abbreviations (e.g., CO not Colorado, NY not New York)
+2. For blank/empty CSV values WITHOUT research: Return nothing (leave completely blank)
+3. For employee count WITH research: Extract and return ONLY a number between 1-30
+4. Match the format expected by the field type
+5. Use exact data from CSV when available
+6. When returning empty values: Output absolutely nothing, not the word 'empty' or 'blank' or 'none'
+"""
+
+EMPLOYEE_KEYWORDS = ('employee', 'staff', 'workforce')
+RESEARCHABLE_FIELDS = ['revenue', 'income', 'industry', 'sector']
+COMPANY_COLUMNS = ['name', 'company', 'company name', 'business', 'business name', 'organization']
+
+def _is_blank_csv_value(csv_row_data, field_id):
+    csv_value = csv_row_data.get(field_id, '')
+    return pd.isna(csv_value) or not str(csv_value).strip()
+
+def _find_company_name(csv_row_data):
+    """Extract company/business name from CSV row, or None."""
+    for col, val in csv_row_data.items():
+        if val and str(val).strip():
+            if col.lower() in COMPANY_COLUMNS:
+                return str(val)
+    return None
+
+def _company_to_research(field_id, csv_row_data):
+    """
+    Return the company name to research for a blank researchable field, or None.
+    CRITICAL: Only research for specific field types when blank.
+    DO NOT research for email, username, password, employee count, etc.
+    """
+    company_name = _find_company_name(csv_row_data)
+    if not company_name or not _is_blank_csv_value(csv_row_data, field_id):
+        return None
+    if not any(keyword in field_id.lower() for keyword in RESEARCHABLE_FIELDS):
+        return None
+    return company_name
+
+def _describe_row_for_prompt(csv_row_data):
+    """Render CSV row as prompt lines, flagging blank values."""
+    text = ""
+    for col, val in csv_row_data.items():
+        if pd.isna(val) or val == '':
+            text += f"- {col}: [BLANK - needs research]\n"
+        else:
+            text += f"- {col}: {val}\n"
+    return text
+
+def _postprocess_llm_value(field_id, suggested_value):
+    """Clean up common LLM mistakes in a suggested value."""
+    suggested_value = str(suggested_value).strip()
+    if suggested_value.lower() in ['empty string', 'empty', 'blank', 'none', 'null', 'n/a', 'not available']:
+        return ''
+    
+    # For employee count fields: Extract just the number
+    if 'employee' in field_id.lower() or 'staff' in field_id.lower():
+        # Extract first number found
+        import re
+        numbers = re.findall(r'\d+', suggested_value)
+        if numbers:
+            num = int(numbers[0])
+            # Clamp to 1-30 range
+            suggested_value = str(min(max(num, 1), 30))
+    
+    # Remove quotes if LLM added them
+    return suggested_value.strip('"\'\'"')
+
+def _infer_field_value_uncached(config, field_context, csv_row_data, available_options=None):
+    """Run the actual LLM (and optional web research) call for one field."""
     try:
         # Build prompt
         field_id = field_context.get('id', 'unknown')
@@ -146,60 +894,15 @@ def infer_field_value_with_llm(field_context, csv_row_data, available_options=No
         
         # SPECIAL CASE: Employee count fields - just return 1 if blank
         field_lower = field_id.lower()
-        csv_value = csv_row_data.get(field_id, '')
-        is_blank = pd.isna(csv_value) or not str(csv_value).strip()
-        
-        if is_blank and ('employee' in field_lower or 'staff' in field_lower or 'workforce' in field_lower):
+        if _is_blank_csv_value(csv_row_data, field_id) and any(k in field_lower for k in EMPLOYEE_KEYWORDS):
             return '1'
         
         # Perform web research if enabled
         research_results = None
         if config.get('enable_search') and config.get('search_api_key'):
-            # Build search query from CSV data
-            search_terms = []
-            company_name = None
-            
-            # Extract company/business name from CSV
-            for col, val in csv_row_data.items():
-                if val and str(val).strip():
-                    col_lower = col.lower()
-                    if col_lower in ['name', 'company', 'company name', 'business', 'business name', 'organization']:
-                        company_name = str(val)
-                        search_terms.append(company_name)
-                        break
-            
-            # Determine if we need to research this field
-            should_research = False
-            field_lower = field_id.lower()
-            
-            # Check if current field's CSV data is blank/missing
-            csv_value = csv_row_data.get(field_id, '')
-            is_blank = pd.isna(csv_value) or not str(csv_value).strip()
-            
-            # CRITICAL: Only research for specific field types when blank
-            # DO NOT research for email, username, password, employee count, etc.
-            researchable_fields = ['revenue', 'income', 'industry', 'sector']
-            
-            if is_blank and company_name:
-                # Check if this field type should be researched
-                for keyword in researchable_fields:
-                    if keyword in field_lower:
-                        should_research = True
-                        break
-            
-            if should_research and company_name:
-                # Build targeted search query based on field type
-                if 'employee' in field_lower or 'staff' in field_lower or 'workforce' in field_lower:
-                    search_query = f"{company_name} number of employees company size"
-                elif 'revenue' in field_lower or 'income' in field_lower:
-                    search_query = f"{company_name} annual revenue company financials"
-                elif 'industry' in field_lower or 'sector' in field_lower:
-                    search_query = f"{company_name} industry sector business type"
-                else:
-                    search_query = f"{company_name} {field_id.replace('_', ' ')}"
-                
-                print(f"    Researching: {search_query}")
-                research_results = perform_web_research(search_query, config['search_api_key'])
+            company_name = _company_to_research(field_id, csv_row_data)
+            if company_name:
+                research_results = research_company(company_name, config['search_api_key'])
         
         # Build detailed context
         context = f"""CONTEXT: You are filling out a web form with lead/business data. This is part of an automated workflow that processes CSV data row-by-row.
@@ -210,21 +913,10 @@ FORM FIELD BEING FILLED:
 - Field Tag: {field_tag}
 - Purpose: This field expects data related to '{field_id}'
 
-RULES:
-1. For STATE fields: ALWAYS use 2-letter abbreviations (e.g., CO not Colorado, NY not New York)
-2. For blank/empty CSV values WITHOUT research: Return nothing (leave completely blank)
-3. For employee count WITH research: Extract and return ONLY a number between 1-30
-4. Match the format expected by the field type
-5. Use exact data from CSV when available
-6. When returning empty values: Output absolutely nothing, not the word 'empty' or 'blank' or 'none'
-
+{LLM_RULES}
 BUSINESS DATA FROM CSV:
 """
-        for col, val in csv_row_data.items():
-            if pd.isna(val) or val == '':
-                context += f"- {col}: [BLANK - needs research]\n"
-            else:
-                context += f"- {col}: {val}\n"
+        context += _describe_row_for_prompt(csv_row_data)
         
         if research_results:
             context += f"\n=== WEB RESEARCH RESULTS ===\n{research_results}\n"
@@ -238,187 +930,546 @@ BUSINESS DATA FROM CSV:
         else:
             context += "\nTASK: Return ONLY the value to enter. No explanation, no quotes, just the raw value."
         
-        # Call OpenAI API
-        client = OpenAI(api_key=config['api_key'], base_url=config.get('base_url'))
-        
-        system_prompt = """You are a form-filling assistant for automated lead processing workflows.
-
-KEY RULES:
-- For US states: ALWAYS use 2-letter codes (CO, NY, CA, etc.) never full names
-- Match exact format of dropdown options when provided
-- When CSV data is BLANK and NO research: Return absolutely nothing (blank output)
-- For employee count WITH research: Return ONLY a number between 1-30 (e.g., "15" or "8")
-- For revenue: Extract from "$5M revenue" (return just number like "5000000")
-- Be precise and concise - return only the value, nothing else
-- NEVER output words like "empty", "blank", "none", "null" - just leave it empty
-- Consider the field ID/name to understand what data is expected"""
-        
-        response = client.chat.completions.create(
-            model=config.get('model', 'gpt-4o-mini'),
+        # Call OpenAI API (shared pooled client)
+        response = LLM_SERVICE.chat(
+            'field',
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": LLM_SYSTEM_PROMPT},
                 {"role": "user", "content": context}
             ],
             temperature=0.2,
             max_tokens=150
         )
         
-        suggested_value = response.choices[0].message.content.strip()
-        
-        # Post-process: Clean up common LLM mistakes
-        if suggested_value.lower() in ['empty string', 'empty', 'blank', 'none', 'null', 'n/a', 'not available']:
-            return ''
-        
-        # For employee count fields: Extract just the number
-        if 'employee' in field_id.lower() or 'staff' in field_id.lower():
-            # Extract first number found
-            import re
-            numbers = re.findall(r'\d+', suggested_value)
-            if numbers:
-                num = int(numbers[0])
-                # Clamp to 1-30 range
-                suggested_value = str(min(max(num, 1), 30))
-        
-        # Remove quotes if LLM added them
-        suggested_value = suggested_value.strip('"\'\'"')
-        
-        return suggested_value
+        return _postprocess_llm_value(field_id, response.choices[0].message.content)
     
     except Exception as e:
         print(f"LLM inference error: {e}")
         return None
 
-def init_driver(headless=False, parent=None):
+def collect_unmapped_field_actions(config, columns=None):
     """
-    Initialize a Selenium WebDriver with Chrome or Edge.
-    - Automatically detects installed browsers.
-    - If multiple locations found, lets user select.
-    - Provides clear errors if none found.
+    Return input/select actions that will need LLM inference: those with no CSV
+    mapping (or mapped to a column missing from `columns`). One action per selector.
     """
-    import os
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service
-    from selenium.webdriver.edge.service import Service as EdgeService
-    from selenium.webdriver.chrome.options import Options as ChromeOptions
-    from selenium.webdriver.edge.options import Options as EdgeOptions
-    from webdriver_manager.chrome import ChromeDriverManager
-    from webdriver_manager.microsoft import EdgeChromiumDriverManager
-
-    # Helper to detect installed browser binaries
-    def detect_browsers():
-        chrome_paths = [
-            os.path.expandvars(r"C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe"),
-            os.path.expandvars(r"C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe"),
-            os.path.expandvars(r"C:\\Users\\%USERNAME%\\AppData\\Local\\Google\\Chrome\\Application\\chrome.exe")
-        ]
-        edge_paths = [
-            os.path.expandvars(r"C:\\Program Files\\Microsoft\\Edge\\Application\\msedge.exe"),
-            os.path.expandvars(r"C:\\Program Files (x86)\\Microsoft\\Edge\\Application\\msedge.exe"),
-            os.path.expandvars(r"C:\\Users\\%USERNAME%\\AppData\\Local\\Microsoft\\Edge\\Application\\msedge.exe")
-        ]
-        installed = {'chrome': [], 'edge': []}
-        for p in chrome_paths:
-            if os.path.exists(p):
-                installed['chrome'].append(p)
-        for p in edge_paths:
-            if os.path.exists(p):
-                installed['edge'].append(p)
-        return installed
-
-    installed = detect_browsers()
-
-    # Ask user to pick if multiple
-    browser_choice = None
-    binary_path = None
-    if installed['chrome']:
-        if len(installed['chrome']) == 1:
-            browser_choice = 'chrome'
-            binary_path = installed['chrome'][0]
-        else:
-            browser_choice = 'chrome'
-            binary_path = simpledialog.askstring(
-                "Select Chrome",
-                f"Multiple Chrome installations detected:\n{installed['chrome']}\nEnter full path to use:",
-                parent=parent
-            )
-    elif installed['edge']:
-        if len(installed['edge']) == 1:
-            browser_choice = 'edge'
-            binary_path = installed['edge'][0]
-        else:
-            browser_choice = 'edge'
-            binary_path = simpledialog.askstring(
-                "Select Edge",
-                f"Multiple Edge installations detected:\n{installed['edge']}\nEnter full path to use:",
-                parent=parent
-            )
-    else:
-        messagebox.showerror(
-            "Browser Not Found",
-            "No Chrome or Edge installations detected. Please install Google Chrome or Microsoft Edge."
-        )
-        raise RuntimeError("No Chromium-based browser found.")
+    csv_mapping = config.get('csv_mapping', {})
+    unmapped = []
+    seen = set()
+    for action in config.get('actions', []):
+        if action.get('action') not in ('input', 'select'):
+            continue
+        selector = action.get('selector')
+        if not selector or selector in seen:
+            continue
+        csv_col = csv_mapping.get(selector)
+        if csv_col == '__RECORDED__':
+            continue
+        if csv_col and (columns is None or csv_col in columns):
+            continue
+        seen.add(selector)
+        unmapped.append(action)
+    return unmapped
 
-    # Set options
-    if browser_choice == 'chrome':
-        options = ChromeOptions()
-        if headless:
-            options.add_argument("--headless=new")
-        if binary_path:
-            options.binary_location = binary_path
-        try:
-            # Check for local chromedriver in common locations
-            local_driver = os.environ.get("CHROME_DRIVER_PATH")
-            if not local_driver:
-                candidates = [
-                    os.path.join(os.getcwd(), "drivers", "chromedriver.exe"),
-                    os.path.join(os.getcwd(), "drivers", "chromedriver_win64", "chromedriver.exe"),
-                ]
-                for c in candidates:
-                    if os.path.exists(c):
-                        local_driver = c
-                        break
-            
-            if local_driver and os.path.exists(local_driver):
-                return webdriver.Chrome(service=Service(executable_path=local_driver), options=options)
-            else:
-                return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        except Exception as e:
-            raise RuntimeError(f"Failed to start Chrome driver: {e}")
-    elif browser_choice == 'edge':
-        options = EdgeOptions()
-        if headless:
-            options.add_argument("--headless=new")
-        if binary_path:
-            options.binary_location = binary_path
+def infer_row_values_with_llm(field_actions, csv_row_data):
+    """
+    Infer values for all unmapped fields of one CSV row with a single
+    structured (JSON-mode) completion instead of one call per field.
+    
+    Args:
+        field_actions: list of input/select action dicts (see collect_unmapped_field_actions)
+        csv_row_data: dict of CSV column -> value for this row
+    
+    Returns:
+        dict: selector -> suggested value. Fields the model did not answer are
+        omitted so callers can fall back to per-field inference. Empty dict if
+        LLM disabled or error.
+    """
+    config = LLM_SERVICE.config()
+    if not field_actions or not config.get('enabled') or not config.get('api_key'):
+        return {}
+    
+    search_enabled = bool(config.get('enable_search') and config.get('search_api_key'))
+    fields = []
+    for action in field_actions:
+        ctx = action.get('field_context', {}) or {}
+        fields.append({
+            'selector': action.get('selector'),
+            'id': ctx.get('id') or ctx.get('name') or 'unknown',
+            'type': ctx.get('type') or 'text',
+            'tag': ctx.get('tag') or action.get('action'),
+            'options': ctx.get('options') or [],
+        })
+    
+    key = cache_key(
+        'row',
+        config.get('model', 'gpt-4o-mini'),
+        config.get('base_url'),
+        search_enabled,
+        [{k: f[k] for k in ('selector', 'id', 'type', 'tag', 'options')} for f in fields],
+        _normalize_row_for_cache(csv_row_data),
+    )
+    cached = LLM_CACHE.get(key)
+    if cached is not None:
+        print(f"    LLM cache hit for row batch of {len(fields)} fields ({LLM_CACHE.stats()})")
+        return cached
+    
+    values = {}
+    pending = []
+    for f in fields:
+        # SPECIAL CASE: Employee count fields - just return 1 if blank
+        if _is_blank_csv_value(csv_row_data, f['id']) and any(k in f['id'].lower() for k in EMPLOYEE_KEYWORDS):
+            values[f['selector']] = '1'
+        else:
+            pending.append(f)
+    
+    if pending:
         try:
-            # Check for local msedgedriver in common locations
-            local_driver = os.environ.get("EDGE_DRIVER_PATH")
-            if not local_driver:
-                candidates = [
-                    os.path.join(os.getcwd(), "drivers", "msedgedriver.exe"),
-                    os.path.join(os.getcwd(), "drivers", "edgedriver_win64", "msedgedriver.exe"),
-                ]
-                for c in candidates:
-                    if os.path.exists(c):
-                        local_driver = c
-                        break
+            # Web research, one combined (cached) search per company
+            research = {}
+            if search_enabled:
+                for f in pending:
+                    company_name = _company_to_research(f['id'], csv_row_data)
+                    if company_name and company_name not in research:
+                        research[company_name] = research_company(company_name, config['search_api_key'])
+            
+            context = f"""CONTEXT: You are filling out a web form with lead/business data. This is part of an automated workflow that processes CSV data row-by-row.
+
+{LLM_RULES}
+BUSINESS DATA FROM CSV:
+"""
+            context += _describe_row_for_prompt(csv_row_data)
+            
+            research_text = "\n\n".join(r for r in research.values() if r)
+            if research_text:
+                context += f"\n=== WEB RESEARCH RESULTS ===\n{research_text}\n"
+                context += "\nIMPORTANT: Fields whose CSV data is BLANK should be answered from the web research above.\n"
+            
+            context += "\n=== FORM FIELDS TO FILL ===\n"
+            for i, f in enumerate(pending, 1):
+                context += f"- f{i}: Field ID '{f['id']}', Type: {f['type']}, Tag: {f['tag']}\n"
+                if f['options']:
+                    context += f"  Options (choose EXACT text): {f['options']}\n"
+            context += (
+                "\nTASK: Return a JSON object mapping each field key (f1, f2, ...) to the raw value "
+                "to enter. Use \"\" for fields that should be left blank. No explanations."
+            )
             
-            if local_driver and os.path.exists(local_driver):
-                return webdriver.Edge(service=EdgeService(executable_path=local_driver), options=options)
-            else:
-                return webdriver.Edge(service=EdgeService(EdgeChromiumDriverManager().install()), options=options)
+            response = LLM_SERVICE.chat(
+                'row',
+                messages=[
+                    {"role": "system", "content": LLM_SYSTEM_PROMPT},
+                    {"role": "user", "content": context}
+                ],
+                temperature=0.2,
+                max_tokens=100 + 60 * len(pending),
+                response_format={"type": "json_object"}
+            )
+            answers = json.loads(response.choices[0].message.content or '{}')
+            for i, f in enumerate(pending, 1):
+                if f'f{i}' in answers and answers[f'f{i}'] is not None:
+                    values[f['selector']] = _postprocess_llm_value(f['id'], answers[f'f{i}'])
         except Exception as e:
-            raise RuntimeError(f"Failed to start Edge driver: {e}")
+            print(f"LLM batch inference error: {e}")
+            return values
+    
+    # Only cache complete answers so partial failures get retried
+    if len(values) == len(fields):
+        LLM_CACHE.set(key, values)
+    return values
 
-def detect_dynamic_fields(driver):
-    """Wait for fields to render, then extract them from the page."""
-    # Wait up to 10 seconds for at least one input/select/textarea to appear
+def llm_usage_summary():
+    """Log lines describing cache effectiveness and where inference time went."""
+    lines = []
+    if LLM_CACHE.hits or LLM_CACHE.misses:
+        lines.append(f"LLM cache: {LLM_CACHE.stats()}")
+    if RESEARCH_CACHE.hits or RESEARCH_CACHE.misses:
+        lines.append(f"Research cache: {RESEARCH_CACHE.stats()}")
+    latency = LLM_SERVICE.latency_stats()
+    if latency:
+        lines.append(f"LLM latency: {latency}")
+    return lines
+
+def infer_row_values(config, row):
+    """Row-level inference stage: resolve every unmapped field of `row` in one request."""
+    field_actions = collect_unmapped_field_actions(config, columns=row.index)
+    if not field_actions:
+        return {}
+    return infer_row_values_with_llm(field_actions, row.to_dict())
+
+# Browser discovery and driver resolution are memoized for the process:
+# _detect_browsers() touches the filesystem (and may prompt the user), and
+# ChromeDriverManager().install() does a network version check. The result is
+# also persisted to BROWSER_DISCOVERY_FILE and reused across launches while
+# the browser binary's mtime and version are unchanged and the driver still
+# exists; a driver/browser mismatch at startup drops the record (see init_driver).
+_browser_selection = None
+_driver_paths = {}
+_driver_discovery_lock = threading.Lock()
+
+def _browser_version(binary_path):
+    """Browser version from the versioned folder next to chrome.exe/msedge.exe ('' if unknown)."""
+    import re
     try:
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "input, select, textarea"))
-        )
-    except Exception:
+        versions = [d for d in os.listdir(os.path.dirname(binary_path)) if re.match(r'^\d+(\.\d+){3}$', d)]
+    except OSError:
+        return ''
+    return max(versions, key=lambda v: [int(x) for x in v.split('.')], default='')
+
+def _load_browser_discovery():
+    """Return the persisted discovery record if it still matches the installed browser, else None."""
+    try:
+        with open(BROWSER_DISCOVERY_FILE, 'r') as f:
+            record = json.load(f)
+        if os.stat(record['binary_path']).st_mtime_ns != record['binary_mtime_ns']:
+            return None
+        if _browser_version(record['binary_path']) != record.get('version', ''):
+            return None
+        if record.get('driver_path') and not os.path.exists(record['driver_path']):
+            record.pop('driver_path')
+        return record
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def _save_browser_discovery(browser_choice, binary_path, driver_path=None):
+    """Persist the discovery result, fingerprinted by binary mtime and version."""
+    if not binary_path:
+        return
+    try:
+        record = {
+            'browser': browser_choice,
+            'binary_path': binary_path,
+            'binary_mtime_ns': os.stat(binary_path).st_mtime_ns,
+            'version': _browser_version(binary_path),
+        }
+        if driver_path:
+            record['driver_path'] = driver_path
+        os.makedirs('configs', exist_ok=True)
+        with open(BROWSER_DISCOVERY_FILE, 'w') as f:
+            json.dump(record, f, indent=2)
+    except Exception as e:
+        print(f"Error saving browser discovery: {e}")
+
+def _invalidate_browser_discovery():
+    """Forget the memoized and persisted discovery so the next init_driver starts over."""
+    global _browser_selection
+    with _driver_discovery_lock:
+        _browser_selection = None
+        _driver_paths.clear()
+        try:
+            os.remove(BROWSER_DISCOVERY_FILE)
+        except OSError:
+            pass
+
+def _detect_browsers():
+    """Return {'chrome': [paths], 'edge': [paths]} of installed browser binaries."""
+    chrome_paths = [
+        os.path.expandvars(r"C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe"),
+        os.path.expandvars(r"C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe"),
+        os.path.expandvars(r"C:\\Users\\%USERNAME%\\AppData\\Local\\Google\\Chrome\\Application\\chrome.exe")
+    ]
+    edge_paths = [
+        os.path.expandvars(r"C:\\Program Files\\Microsoft\\Edge\\Application\\msedge.exe"),
+        os.path.expandvars(r"C:\\Program Files (x86)\\Microsoft\\Edge\\Application\\msedge.exe"),
+        os.path.expandvars(r"C:\\Users\\%USERNAME%\\AppData\\Local\\Microsoft\\Edge\\Application\\msedge.exe")
+    ]
+    installed = {'chrome': [], 'edge': []}
+    for p in chrome_paths:
+        if os.path.exists(p):
+            installed['chrome'].append(p)
+    for p in edge_paths:
+        if os.path.exists(p):
+            installed['edge'].append(p)
+    return installed
+
+def _select_browser(parent=None):
+    """Return (browser_choice, binary_path), asking the user once if several installs exist."""
+    global _browser_selection
+    with _driver_discovery_lock:
+        if _browser_selection is not None:
+            return _browser_selection
+        record = _load_browser_discovery()
+        if record:
+            _browser_selection = (record['browser'], record['binary_path'])
+            if record.get('driver_path'):
+                _driver_paths[record['browser']] = record['driver_path']
+            return _browser_selection
+        installed = _detect_browsers()
+
+        # Ask user to pick if multiple
+        browser_choice = None
+        binary_path = None
+        if installed['chrome']:
+            if len(installed['chrome']) == 1:
+                browser_choice = 'chrome'
+                binary_path = installed['chrome'][0]
+            else:
+                browser_choice = 'chrome'
+                binary_path = simpledialog.askstring(
+                    "Select Chrome",
+                    f"Multiple Chrome installations detected:\n{installed['chrome']}\nEnter full path to use:",
+                    parent=parent
+                )
+        elif installed['edge']:
+            if len(installed['edge']) == 1:
+                browser_choice = 'edge'
+                binary_path = installed['edge'][0]
+            else:
+                browser_choice = 'edge'
+                binary_path = simpledialog.askstring(
+                    "Select Edge",
+                    f"Multiple Edge installations detected:\n{installed['edge']}\nEnter full path to use:",
+                    parent=parent
+                )
+        else:
+            messagebox.showerror(
+                "Browser Not Found",
+                "No Chrome or Edge installations detected. Please install Google Chrome or Microsoft Edge."
+            )
+            raise RuntimeError("No Chromium-based browser found.")
+        _browser_selection = (browser_choice, binary_path)
+        _save_browser_discovery(browser_choice, binary_path)
+        return _browser_selection
+
+def _resolve_driver_path(browser_choice):
+    """Local driver (env var or drivers/ folder), else the webdriver_manager download (memoized)."""
+    env_driver = os.environ.get("CHROME_DRIVER_PATH" if browser_choice == 'chrome' else "EDGE_DRIVER_PATH")
+    if env_driver and os.path.exists(env_driver):
+        return env_driver
+    with _driver_discovery_lock:
+        if browser_choice in _driver_paths:
+            return _driver_paths[browser_choice]
+        local_driver = None
+        if browser_choice == 'chrome':
+            # Check for local chromedriver in common locations
+            candidates = [
+                os.path.join(os.getcwd(), "drivers", "chromedriver.exe"),
+                os.path.join(os.getcwd(), "drivers", "chromedriver_win64", "chromedriver.exe"),
+            ]
+        else:
+            # Check for local msedgedriver in common locations
+            candidates = [
+                os.path.join(os.getcwd(), "drivers", "msedgedriver.exe"),
+                os.path.join(os.getcwd(), "drivers", "edgedriver_win64", "msedgedriver.exe"),
+            ]
+        for c in candidates:
+            if os.path.exists(c):
+                local_driver = c
+                break
+        if local_driver:
+            path = local_driver
+        elif browser_choice == 'chrome':
+            path = ChromeDriverManager().install()
+        else:
+            path = EdgeChromiumDriverManager().install()
+        _driver_paths[browser_choice] = path
+        if _browser_selection and _browser_selection[0] == browser_choice:
+            _save_browser_discovery(browser_choice, _browser_selection[1], path)
+        return path
+
+def init_driver(headless=False, parent=None, capture_network=False, _retried=False):
+    """
+    Initialize a Selenium WebDriver with Chrome or Edge.
+    - Automatically detects installed browsers.
+    - If multiple locations found, lets user select.
+    - Provides clear errors if none found.
+    - capture_network enables the performance log (see drain_network_log).
+    - If the cached driver no longer matches the browser (SessionNotCreatedException),
+      discovery is dropped and retried once.
+    Use DRIVER_POOL.lease() instead to reuse an already-running browser.
+    """
+    browser_choice, binary_path = _select_browser(parent)
+
+    # Set options
+    if browser_choice == 'chrome':
+        options = ChromeOptions()
+        if headless:
+            options.add_argument("--headless=new")
+        if capture_network:
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        if binary_path:
+            options.binary_location = binary_path
+        label = "Chrome"
+        start = lambda: webdriver.Chrome(service=Service(executable_path=_resolve_driver_path('chrome')), options=options)
+    elif browser_choice == 'edge':
+        options = EdgeOptions()
+        if headless:
+            options.add_argument("--headless=new")
+        if capture_network:
+            options.set_capability('ms:loggingPrefs', {'performance': 'ALL'})
+        if binary_path:
+            options.binary_location = binary_path
+        label = "Edge"
+        start = lambda: webdriver.Edge(service=EdgeService(executable_path=_resolve_driver_path('edge')), options=options)
+    try:
+        return start()
+    except SessionNotCreatedException as e:
+        if _retried:
+            raise RuntimeError(f"Failed to start {label} driver: {e}")
+        _invalidate_browser_discovery()
+        return init_driver(headless, parent, capture_network, _retried=True)
+    except Exception as e:
+        raise RuntimeError(f"Failed to start {label} driver: {e}")
+
+DRIVER_POOL_MAX_IDLE = 4
+
+class DriverPool:
+    """
+    Keeps launched headless browsers warm between runs.
+
+    lease() hands out an idle driver with matching launch options (headless,
+    capture_network) or starts a new one; release() resets it (a fresh tab,
+    cookies and storage of every origin it visited) and parks it for the next
+    run. Headed browsers, drivers that fail the reset and drivers beyond
+    DRIVER_POOL_MAX_IDLE are quit.
+    """
+    def __init__(self, max_idle=DRIVER_POOL_MAX_IDLE):
+        self.max_idle = max_idle
+        self._idle = []  # [(key, driver)]
+        self._keys = {}  # id(driver) -> key
+        self._warming = {}  # key -> prewarm launches in flight
+        self._lock = threading.Lock()
+
+    def lease(self, headless=False, parent=None, capture_network=False):
+        key = (bool(headless), bool(capture_network))
+        while True:
+            with self._lock:
+                match = next((entry for entry in self._idle if entry[0] == key), None)
+                if match:
+                    self._idle.remove(match)
+            if not match:
+                break
+            driver = match[1]
+            try:
+                _ = driver.window_handles  # Still alive?
+                return driver
+            except Exception:
+                with self._lock:
+                    self._keys.pop(id(driver), None)
+        driver = init_driver(headless=headless, parent=parent, capture_network=capture_network)
+        install_readiness_hooks(driver)  # Before the first page, so its requests are tracked
+        with self._lock:
+            self._keys[id(driver)] = key
+        return driver
+
+    def prewarm(self, count=1, headless=True, parent=None):
+        """Top the pool up to `count` idle drivers in the background so the next lease() is instant."""
+        key = (bool(headless), False)
+        with self._lock:
+            ready = sum(1 for entry in self._idle if entry[0] == key) + self._warming.get(key, 0)
+            missing = max(0, min(count, self.max_idle) - ready)
+            self._warming[key] = self._warming.get(key, 0) + missing
+
+        def launch():
+            driver = None
+            try:
+                driver = init_driver(headless=headless, parent=parent)
+                install_readiness_hooks(driver)
+            except Exception as e:
+                print(f"Driver prewarm failed: {e}")
+            with self._lock:
+                self._warming[key] -= 1
+                if driver is not None:
+                    self._keys[id(driver)] = key
+            if driver is not None:
+                self.release(driver)
+        for _ in range(missing):
+            threading.Thread(target=launch, daemon=True).start()
+
+    def release(self, driver):
+        """Reset a leased driver and return it to the pool (or quit it)."""
+        if driver is None:
+            return
+        key = self._keys.get(id(driver))
+        if key is not None and not key[0]:
+            key = None  # Don't leave a visible window sitting on the desktop
+        if key is not None:
+            try:
+                self._reset(driver)
+            except Exception:
+                key = None
+        with self._lock:
+            if key is not None and len(self._idle) < self.max_idle:
+                self._idle.append((key, driver))
+                return
+            self._keys.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _visited_origins(driver):
+        """http(s) origins in the current tab's navigation history (needs CDP)."""
+        from urllib.parse import urlparse
+        try:
+            entries = driver.execute_cdp_cmd('Page.getNavigationHistory', {}).get('entries', [])
+        except Exception:
+            return set()
+        origins = set()
+        for entry in entries:
+            parts = urlparse(entry.get('url') or '')
+            if parts.scheme in ('http', 'https') and parts.netloc:
+                origins.add(f"{parts.scheme}://{parts.netloc}")
+        return origins
+
+    @staticmethod
+    def _reset(driver):
+        old_handles = driver.window_handles
+        origins = set()
+        for handle in old_handles:
+            driver.switch_to.window(handle)
+            try:
+                # Without CDP only the current origin can be cleared
+                driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+            except Exception:
+                pass
+            origins |= DriverPool._visited_origins(driver)
+        # A new tab starts with empty sessionStorage and history for every origin
+        driver.switch_to.new_window('tab')
+        fresh = driver.current_window_handle
+        for handle in old_handles:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(fresh)
+        for origin in origins:
+            try:
+                driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+            except Exception:
+                break
+        try:
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        except Exception:
+            driver.delete_all_cookies()
+        try:
+            driver.get_log('performance')  # Discard network events from the previous lease
+        except Exception:
+            pass
+        # Blocked URLs and new-document scripts were registered on the closed tab
+        driver._lg_readiness_hooked = False
+        install_readiness_hooks(driver)
+        driver.get('about:blank')
+
+    def shutdown(self):
+        """Quit every idle driver (called on app exit)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._keys.clear()
+        for _, driver in idle:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+DRIVER_POOL = DriverPool()
+
+def detect_dynamic_fields(driver):
+    """Wait for fields to render, then extract them from the page."""
+    # Wait up to 10 seconds for at least one input/select/textarea to appear
+    try:
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "input, select, textarea"))
+        )
+    except Exception:
         # If timeout, proceed anyway - page might not have forms
         pass
     
@@ -443,60 +1494,341 @@ def detect_dynamic_fields(driver):
 # Recording Helpers (JS Injection)
 # -------------------------
 
-def inject_recorder(driver):
-    """Inject JavaScript into the page to record user actions into window._lgEvents."""
-    script = r"""
-    (function(){
+RECORDER_POLL_INTERVAL = 1.0  # Seconds between background navigation/liveness checks
+RECORDER_REORDER_WAIT = 0.3   # Seconds an event waits for earlier events of its page before a gap is skipped
+
+# Installs the recorder in a document. Events are kept in sessionStorage until
+# the push channel confirms delivery, so nothing is lost when a click unloads
+# the page; a new document re-sends what the previous one could not deliver.
+# Each document also reports its URL ('page' events, including SPA route
+# changes) so navigations are recorded without any work from Python.
+RECORDER_SCRIPT = r"""
+(function(beaconUrl){
+  try {
+    if (window.top !== window) return false;
+    if (beaconUrl) window._lgBeacon = beaconUrl;
+    if (window._lgRecorderInstalled) return true;
+    window._lgRecorderInstalled = true;
+    var KEY = '_lgPending', memory = [];
+    function loadPending(){ try { return JSON.parse(sessionStorage.getItem(KEY) || '[]'); } catch(e) { return memory; } }
+    function savePending(list){ try { sessionStorage.setItem(KEY, JSON.stringify(list)); } catch(e) { memory = list; } }
+    function post(entry){
+      if (!window._lgBeacon || !window.fetch) return;
       try {
-        if (window._lgRecorderInstalled) return true;
-        window._lgRecorderInstalled = true;
-        window._lgEvents = [];
-        function cssPath(el){
-          if (!(el instanceof Element)) return '';
-          var path = [];
-          while (el && el.nodeType === Node.ELEMENT_NODE){
-            var selector = el.nodeName.toLowerCase();
-            if (el.id){ selector += '#' + el.id; path.unshift(selector); break; }
-            else {
-              var sib = el, nth = 1;
-              while (sib = sib.previousElementSibling){ if (sib.nodeName.toLowerCase() === el.nodeName.toLowerCase()) nth++; }
-              selector += ':nth-of-type(' + nth + ')';
-            }
-            path.unshift(selector);
-            el = el.parentNode;
-          }
-          return path.join(' > ');
-        }
-        function record(evt){
-          var t = evt.target; if (!t) return;
-          var tag = (t.tagName||'').toLowerCase();
-          if (['input','select','textarea','button','a'].indexOf(tag) === -1 && evt.type==='click'){
-            var closest = t.closest && t.closest('input,select,textarea,button,a');
-            if (closest) { t = closest; tag = t.tagName.toLowerCase(); }
-          }
-          var entry = {
-            eventType: evt.type,
-            tag: tag,
-            id: t.id || null,
-            name: t.name || null,
-            typeAttr: t.type || null,
-            value: (evt.type === 'input' || evt.type === 'change') ? (t.value || '') : null,
-            cssPath: cssPath(t),
-            ts: Date.now()
-          };
-          window._lgEvents.push(entry);
+        // keepalive lets the request outlive a navigation started by this very click
+        fetch(window._lgBeacon, {method: 'POST', body: JSON.stringify([entry]), keepalive: true, mode: 'no-cors'})
+          .then(function(){ savePending(loadPending().filter(function(e){ return e.uid !== entry.uid; })); }, function(){});
+      } catch(e) {}
+    }
+    function send(entry){
+      var list = loadPending();
+      list.push(entry);
+      savePending(list);
+      post(entry);
+    }
+    window._lgDrain = function(){ var r = loadPending(); savePending([]); return r; };
+    var pageId = Date.now().toString(36) + Math.random().toString(36).slice(2, 8), seq = 0, lastHref = null;
+    function page(){
+      if (location.href === lastHref) return;
+      lastHref = location.href;
+      send({eventType: 'page', url: location.href, ts: Date.now(), uid: pageId + ':' + (++seq)});
+    }
+    function cssPath(el){
+      if (!(el instanceof Element)) return '';
+      var path = [];
+      while (el && el.nodeType === Node.ELEMENT_NODE){
+        var selector = el.nodeName.toLowerCase();
+        if (el.id){ selector += '#' + el.id; path.unshift(selector); break; }
+        else {
+          var sib = el, nth = 1;
+          while (sib = sib.previousElementSibling){ if (sib.nodeName.toLowerCase() === el.nodeName.toLowerCase()) nth++; }
+          selector += ':nth-of-type(' + nth + ')';
         }
-        ['click','input','change'].forEach(function(type){ document.addEventListener(type, record, true); });
-        window._lgDrain = function(){ var r = window._lgEvents.slice(); window._lgEvents.length = 0; return r; };
-        return true;
-      } catch(e) { return false; }
-    })();
+        path.unshift(selector);
+        el = el.parentNode;
+      }
+      return path.join(' > ');
+    }
+    function record(evt){
+      var t = evt.target; if (!t) return;
+      var tag = (t.tagName||'').toLowerCase();
+      if (['input','select','textarea','button','a'].indexOf(tag) === -1 && evt.type==='click'){
+        var closest = t.closest && t.closest('input,select,textarea,button,a');
+        if (closest) { t = closest; tag = t.tagName.toLowerCase(); }
+      }
+      send({
+        eventType: evt.type,
+        tag: tag,
+        id: t.id || null,
+        name: t.name || null,
+        typeAttr: t.type || null,
+        value: (evt.type === 'input' || evt.type === 'change') ? (t.value || '') : null,
+        cssPath: cssPath(t),
+        ts: Date.now(),
+        uid: pageId + ':' + (++seq)
+      });
+    }
+    ['pushState', 'replaceState'].forEach(function(m){
+      try {
+        var orig = history[m];
+        history[m] = function(){ var r = orig.apply(this, arguments); page(); return r; };
+      } catch(e) {}
+    });
+    window.addEventListener('popstate', page);
+    window.addEventListener('hashchange', page);
+    ['click','input','change'].forEach(function(type){ document.addEventListener(type, record, true); });
+    loadPending().forEach(post);
+    page();
+    return true;
+  } catch(e) { return false; }
+})(__LG_BEACON_URL__);
+"""
+
+def recorder_source(beacon_url=None):
+    """RECORDER_SCRIPT bound to a push channel URL (RecorderEventServer.url)."""
+    return RECORDER_SCRIPT.replace('__LG_BEACON_URL__', json.dumps(beacon_url))
+
+def inject_recorder(driver, beacon_url=None):
+    """
+    Inject JavaScript into the current page to record user actions.
+
+    With beacon_url (see RecorderEventServer) every event is pushed to the
+    local channel as it happens; undelivered events, or all events without
+    one, wait in sessionStorage for window._lgDrain().
     """
     try:
-        driver.execute_script(script)
+        driver.execute_script('return ' + recorder_source(beacon_url))
     except Exception:
         pass
 
+def register_recorder(driver, beacon_url=None):
+    """
+    Have the browser install the recorder in every new document itself
+    (CDP Page.addScriptToEvaluateOnNewDocument), then install it in the
+    current one. Returns False when the browser has no CDP support; callers
+    must then re-inject after navigations.
+    """
+    registered = False
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': recorder_source(beacon_url)})
+        registered = True
+    except Exception:
+        pass
+    inject_recorder(driver, beacon_url)
+    return registered
+
+# One round trip per background poll: current URL, whether this document has
+# the recorder, and any events the push channel could not deliver.
+RECORDER_STATE_SCRIPT = """
+return [location.href, !!window._lgRecorderInstalled, window._lgDrain ? window._lgDrain() : []];
+"""
+
+class RecorderEventServer:
+    """
+    Local push channel for the page recorder. The injected script POSTs each
+    event to self.url on 127.0.0.1 and the events land in self.events.
+    """
+    def __init__(self):
+        self.events = queue.Queue()
+        events = self.events
+
+        class Handler(BaseHTTPRequestHandler):
+            def _cors_headers(self):
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.send_header('Access-Control-Allow-Methods', 'POST')
+                self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+                self.send_header('Access-Control-Allow-Private-Network', 'true')
+
+            def do_OPTIONS(self):
+                self.send_response(204)
+                self._cors_headers()
+                self.end_headers()
+
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    payload = json.loads(self.rfile.read(length) or b'[]')
+                except ValueError:
+                    payload = []
+                for ev in payload if isinstance(payload, list) else [payload]:
+                    if isinstance(ev, dict):
+                        events.put(ev)
+                self.send_response(204)
+                self._cors_headers()
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass  # Keep the console quiet
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/events"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        try:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+        except Exception:
+            pass
+
+class RecordingSession:
+    """
+    Background consumer for a live recording. Pushed events are turned into
+    actions as they arrive; the recorder is registered for every new document
+    and reports navigations itself. A light poll (one round trip per
+    poll_interval) picks up undelivered events and notices when the browser
+    is closed. Without CDP the poll also re-injects after navigations.
+
+    Each event is POSTed on its own request and handled on its own server
+    thread, so they can arrive out of order (a blur 'change' just behind the
+    submit 'click'). Events are held per page and applied in seq order; a
+    missing seq is waited for at most RECORDER_REORDER_WAIT seconds.
+
+    on_action(act) and on_finish() are called from the consumer thread.
+    """
+    def __init__(self, driver, on_action, on_finish=None, poll_interval=RECORDER_POLL_INTERVAL):
+        self.driver = driver
+        self.on_action = on_action
+        self.on_finish = on_finish
+        self.poll_interval = poll_interval
+        self.server = None
+        self.auto_inject = False
+        self.last_url = None
+        self._seen = set()
+        self._field_seq = {}
+        self._pages = {}  # pageId -> {'next': seq, 'held': {seq: event}, 'since': time}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.server = RecorderEventServer().start()
+        self.auto_inject = register_recorder(self.driver, self.server.url)
+        try:
+            self.last_url = self.driver.current_url
+        except Exception:
+            pass
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _handle(self, ev):
+        uid = ev.get('uid')
+        if uid:
+            if uid in self._seen:
+                return
+            self._seen.add(uid)
+        page_id, _, seq = (uid or '').rpartition(':')
+        if not page_id or not seq.isdigit():
+            self._apply(ev)
+            return
+        page = self._pages.setdefault(page_id, {'next': 1, 'held': {}, 'since': None})
+        if int(seq) < page['next']:
+            self._apply(ev)  # Its gap was already given up on
+            return
+        page['held'][int(seq)] = ev
+        self._release(page)
+
+    def _release(self, page, force=False):
+        """Apply held events of a page in seq order, skipping a gap once it has waited long enough."""
+        now = time.time()
+        if page['since'] is None:
+            page['since'] = now
+        while page['held']:
+            if page['next'] not in page['held']:
+                if not force and now - page['since'] < RECORDER_REORDER_WAIT:
+                    return
+                page['next'] = min(page['held'])
+            self._apply(page['held'].pop(page['next']))
+            page['next'] += 1
+            page['since'] = now
+        page['since'] = None
+
+    def _release_all(self, force=False):
+        for page in self._pages.values():
+            if page['held']:
+                self._release(page, force)
+
+    def _apply(self, ev):
+        if ev.get('eventType') in ('input', 'change') and not self._latest_value(ev):
+            return
+        if ev.get('eventType') == 'page':
+            self._navigated(ev.get('url'))
+            return
+        act = build_action_from_event(ev)
+        if act:
+            self.on_action(act)
+
+    def _latest_value(self, ev):
+        """
+        False for an input/change event older than one already handled for the
+        same field. Events are POSTed one request each and may arrive out of
+        order; the uid (pageId:seq) orders them within a document.
+        """
+        page_id, _, seq = (ev.get('uid') or '').rpartition(':')
+        if not page_id or not seq.isdigit():
+            return True
+        field = (page_id, ev.get('id') or ev.get('name') or ev.get('cssPath'))
+        if int(seq) < self._field_seq.get(field, 0):
+            return False
+        self._field_seq[field] = int(seq)
+        return True
+
+    def _poll(self):
+        """Check the browser once; returns False when it has been closed."""
+        try:
+            url, installed, pending = self.driver.execute_script(RECORDER_STATE_SCRIPT)
+        except Exception:
+            return False
+        for ev in pending or []:
+            self._handle(ev)
+        if not self.auto_inject:
+            self._navigated(url)
+            if not installed:
+                inject_recorder(self.driver, self.server.url)
+        return True
+
+    def _navigated(self, url):
+        if url and url != self.last_url:
+            self.on_action({'action': 'navigate', 'url': url, 'from_url': self.last_url})
+            self.last_url = url
+
+    def _run(self):
+        next_poll = time.time() + self.poll_interval
+        try:
+            while not self._stop.is_set():
+                wait = next_poll - time.time()
+                if any(page['held'] for page in self._pages.values()):
+                    wait = min(wait, RECORDER_REORDER_WAIT / 3)
+                try:
+                    self._handle(self.server.events.get(timeout=max(0.0, wait)))
+                except queue.Empty:
+                    pass
+                self._release_all()
+                if time.time() < next_poll:
+                    continue
+                next_poll = time.time() + self.poll_interval
+                if not self._poll():
+                    break
+            # Events that arrived just before the browser closed
+            while True:
+                try:
+                    self._handle(self.server.events.get_nowait())
+                except queue.Empty:
+                    break
+            self._release_all(force=True)
+        finally:
+            self.server.stop()
+            if self.on_finish:
+                self.on_finish()
+
 def build_action_from_event(ev):
     """Map a recorded JS event to our action schema."""
     # Prefer ID, then NAME, else CSS
@@ -537,33 +1869,44 @@ def build_action_from_event(ev):
     }
     return act
 
-def deduplicate_actions(actions):
-    """Keep only the final input/select value for each field, preserve clicks and order."""
-    # Track last seen input/select for each selector
-    last_input = {}
-    result = []
-    
-    for act in actions:
-        key = (act.get('by'), act.get('selector'))
+class ActionDeduplicator:
+    """
+    Streaming form of deduplicate_actions. Feed actions one at a time with
+    add() (e.g. while recording); .actions is always the deduplicated
+    workflow so far. Each input/select keeps its final value at the position
+    where the field was first touched since the last click, so keystroke
+    bursts collapse to one step without reordering the form. Other action
+    types (navigate etc.) are dropped. O(1) per action.
+    """
+    def __init__(self):
+        self.actions = []
+        self.seen = 0
+        self._open_fields = {}  # (by, selector) -> index in self.actions since the last click
+
+    def add(self, act):
+        self.seen += 1
         action_type = act.get('action')
-        
         if action_type in ('input', 'select'):
-            # Update the last value for this field
-            last_input[key] = act
+            key = (act.get('by'), act.get('selector'))
+            pos = self._open_fields.get(key)
+            if pos is None:
+                self._open_fields[key] = len(self.actions)
+                self.actions.append(act)
+            else:
+                self.actions[pos] = act
         elif action_type == 'click':
-            # Flush any pending inputs before this click
-            for k in sorted(last_input.keys()):
-                if last_input[k] not in result:
-                    result.append(last_input[k])
-            last_input.clear()
-            result.append(act)
-    
-    # Flush remaining inputs at the end
-    for k in sorted(last_input.keys()):
-        if last_input[k] not in result:
-            result.append(last_input[k])
-    
-    return result
+            # Fields touched after this click are new steps
+            self._open_fields.clear()
+            self.actions.append(act)
+
+    def extend(self, actions):
+        for act in actions:
+            self.add(act)
+        return self
+
+def deduplicate_actions(actions):
+    """Keep only the final input/select value for each field, preserve clicks and order."""
+    return ActionDeduplicator().extend(actions).actions
 
 def detect_fields_via_requests(url: str, timeout: int = 20):
     """
@@ -571,17 +1914,17 @@ def detect_fields_via_requests(url: str, timeout: int = 20):
     This avoids requiring Chrome/Edge and any driver downloads.
     Note: JavaScript-rendered fields won't appear with this method.
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0 Safari/537.36'
-    }
+    headers = {'User-Agent': HTTP_USER_AGENT}
     try:
         resp = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
         resp.raise_for_status()
     except requests.RequestException as e:
         raise RuntimeError(f"HTTP request failed: {e}")
     
-    html = resp.text
-    soup = BeautifulSoup(html, 'html.parser')
+    return parse_form_fields(BeautifulSoup(resp.text, 'html.parser'))
+
+def parse_form_fields(soup):
+    """Detect input/select/textarea fields in already-parsed HTML (keys field_1, field_2, ...)."""
     fields = {}
     for i, input_tag in enumerate(soup.find_all(['input', 'select', 'textarea']), start=1):
         field_info = {
@@ -619,7 +1962,6 @@ def fill_input(driver, by, selector, value):
     actions_log.append({'action': 'input', 'by': by, 'selector': selector, 'value': value})
 
 def select_dropdown(driver, by, selector, value):
-    from selenium.webdriver.support.ui import Select
     el = Select(driver.find_element(by, selector))
     el.select_by_visible_text(value)
     actions_log.append({'action': 'select', 'by': by, 'selector': selector, 'value': value})
@@ -635,9 +1977,8 @@ class CSVMappingWindow:
         self.cancelled = False
         self.existing_mapping = existing_mapping or {}
         
-        # Load CSV
-        self.df = pd.read_csv(csv_file)
-        self.columns = ['(skip)', '(use recorded value)'] + self.df.columns.tolist()
+        # Load CSV header (rows are never needed here)
+        self.columns = ['(skip)', '(use recorded value)'] + CSVRowSource(csv_file).columns
         
         # Show ALL actions for context, not just input/select
         self.all_actions = actions
@@ -814,19 +2155,51 @@ class WorkflowEditorDialog:
         self.result_config = None
         
         # Load CSV columns
-        df = pd.read_csv(csv_file)
-        self.csv_columns = ['(skip)', '(use recorded value)'] + df.columns.tolist()
+        self.csv_columns = ['(skip)', '(use recorded value)'] + CSVRowSource(csv_file).columns
         
         # Create window
         self.window = tk.Toplevel(parent)
         self.window.title("Edit Workflow")
-        self.window.geometry("900x700")
+        self.window.geometry("980x800")
         
         # Title
         ttk.Label(self.window, text="Edit Workflow Settings", font=('Arial', 14, 'bold')).pack(pady=10)
         
         # Loop configuration removed - always runs full workflow for each row
         
+        # Replay pacing (readiness waits + optional throttling floor)
+        pacing_frame = ttk.LabelFrame(self.window, text="Replay Pacing", padding=10)
+        pacing_frame.pack(fill='x', padx=10, pady=5)
+        pacing_setting = config.get('pacing_profile') or DEFAULT_PACING_PROFILE
+        if isinstance(pacing_setting, str):
+            pacing_setting = {'profile': pacing_setting}
+        ttk.Label(pacing_frame, text="Profile:").grid(row=0, column=0, sticky='w', padx=5)
+        self.pacing_var = tk.StringVar(value=pacing_setting.get('profile') or DEFAULT_PACING_PROFILE)
+        ttk.Combobox(pacing_frame, textvariable=self.pacing_var, values=list(PACING_PROFILES.keys()), state='readonly', width=12).grid(row=0, column=1, padx=5)
+        ttk.Label(pacing_frame, text="Min delay per step (s):").grid(row=0, column=2, sticky='w', padx=5)
+        self.min_delay_var = tk.StringVar(value=str(pacing_setting.get('min_delay', '')))
+        ttk.Entry(pacing_frame, textvariable=self.min_delay_var, width=8).grid(row=0, column=3, padx=5)
+        ttk.Label(pacing_frame, text="(blank = profile default)", foreground='gray').grid(row=0, column=4, padx=5)
+        self.fast_fill_var = tk.BooleanVar(value=bool(config.get('fast_fill')))
+        ttk.Checkbutton(pacing_frame, text="Fast fill (set each page's fields in one script; tick Real Keys for fields that need typing)",
+                        variable=self.fast_fill_var).grid(row=1, column=0, columnspan=5, sticky='w', padx=5)
+        
+        # Resource blocking during replay
+        policy_frame = ttk.LabelFrame(self.window, text="Resource Blocking (replay)", padding=10)
+        policy_frame.pack(fill='x', padx=10, pady=5)
+        policy = get_resource_policy(config)
+        self.policy_enabled_var = tk.BooleanVar(value=bool(policy.get('enabled')))
+        self.policy_type_vars = {t: tk.BooleanVar(value=t in policy.get('block_types', [])) for t in ('image', 'font', 'media')}
+        self.policy_trackers_var = tk.BooleanVar(value=bool(policy.get('block_trackers')))
+        self.policy_learn_var = tk.BooleanVar(value=bool(policy.get('learn')))
+        ttk.Checkbutton(policy_frame, text="Enabled", variable=self.policy_enabled_var).grid(row=0, column=0, sticky='w', padx=5)
+        for col, (resource_type, var) in enumerate(self.policy_type_vars.items(), 1):
+            ttk.Checkbutton(policy_frame, text=f"Block {resource_type}s", variable=var).grid(row=0, column=col, sticky='w', padx=5)
+        ttk.Checkbutton(policy_frame, text="Block trackers/ads", variable=self.policy_trackers_var).grid(row=0, column=4, sticky='w', padx=5)
+        ttk.Checkbutton(policy_frame, text="Learn needed domains during verification", variable=self.policy_learn_var).grid(row=1, column=0, columnspan=3, sticky='w', padx=5)
+        if policy.get('learned_block_domains'):
+            ttk.Label(policy_frame, text=f"Learned: blocking {len(policy['learned_block_domains'])} third-party domains", foreground='gray').grid(row=1, column=3, columnspan=2, sticky='w', padx=5)
+        
         # CSV Mappings
         mapping_frame = ttk.LabelFrame(self.window, text="CSV Column Mappings", padding=10)
         mapping_frame.pack(fill='both', expand=True, padx=10, pady=5)
@@ -853,11 +2226,13 @@ class WorkflowEditorDialog:
         ttk.Label(header_frame, text="CSV Column", width=25, font=('Arial', 10, 'bold')).grid(row=0, column=3, padx=5)
         ttk.Label(header_frame, text="Start 2nd+ Rows", width=12, font=('Arial', 10, 'bold')).grid(row=0, column=4, padx=5)
         ttk.Label(header_frame, text="Delete", width=8, font=('Arial', 10, 'bold')).grid(row=0, column=5, padx=5)
+        ttk.Label(header_frame, text="Real Keys", width=9, font=('Arial', 10, 'bold')).grid(row=0, column=6, padx=5)
         
         # Store comboboxes and deletion tracking
         self.mapping_combos = {}
         self.deleted_indices = set()
         self.step_frames = {}
+        self.real_keys_vars = {}
         self.loop_start_var = tk.IntVar(value=config.get('loop_start_step', 0))
         
         # Create row for each action
@@ -918,6 +2293,11 @@ class WorkflowEditorDialog:
             # Delete button
             delete_btn = ttk.Button(row_frame, text="✗ Delete", width=8, command=lambda idx=step_idx: self.delete_step(idx))
             delete_btn.grid(row=0, column=5, padx=5, pady=5)
+            
+            # Fast fill exemption (field needs real keystrokes)
+            if action_type == 'input':
+                self.real_keys_vars[step_idx] = tk.BooleanVar(value=bool(action.get('real_keys')))
+                ttk.Checkbutton(row_frame, variable=self.real_keys_vars[step_idx]).grid(row=0, column=6, padx=5, pady=5)
         
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
@@ -952,6 +2332,11 @@ class WorkflowEditorDialog:
         
         # Filter out deleted steps
         original_actions = self.config.get('actions', [])
+        for idx, var in self.real_keys_vars.items():
+            if var.get():
+                original_actions[idx]['real_keys'] = True
+            else:
+                original_actions[idx].pop('real_keys', None)
         filtered_actions = [action for idx, action in enumerate(original_actions) if idx not in self.deleted_indices]
         
         # Update config
@@ -959,6 +2344,24 @@ class WorkflowEditorDialog:
         self.config['actions'] = filtered_actions
         self.config['loop_start_step'] = self.loop_start_var.get()
         
+        pacing = {'profile': self.pacing_var.get()}
+        try:
+            if self.min_delay_var.get().strip():
+                pacing['min_delay'] = max(0.0, float(self.min_delay_var.get().strip()))
+        except ValueError:
+            pass  # Invalid number - keep profile default
+        self.config['pacing_profile'] = pacing
+        self.config['fast_fill'] = self.fast_fill_var.get()
+        
+        policy = dict(self.config.get('resource_policy') or {})
+        policy.update({
+            'enabled': self.policy_enabled_var.get(),
+            'block_types': [t for t, var in self.policy_type_vars.items() if var.get()],
+            'block_trackers': self.policy_trackers_var.get(),
+            'learn': self.policy_learn_var.get(),
+        })
+        self.config['resource_policy'] = policy
+        
         self.result_config = self.config
         
         if self.main_log:
@@ -996,12 +2399,17 @@ class VerificationDialog:
         self.deleted_steps = []  # Track deleted steps for restore
         self.approved = False
         self.main_log = main_log_func  # Log to main app output
+        self.network_requests = {}  # Captured POSTs for the HTTP fast-path compiler
+        # Domains contacted during verification (resource-policy learn mode)
+        self.domain_types = {} if get_resource_policy(config).get('learn') else None
         
         # Load first row of CSV for testing
-        df = pd.read_csv(csv_file)
+        df = CSVRowSource(csv_file).read_rows([0])
         if len(df) == 0:
             raise ValueError("CSV file is empty")
         self.test_row = df.iloc[0].to_dict()
+        self.test_series = df.iloc[0]
+        self._row_inference = None  # (values, from_cache) of the row-level inference for test_row
         
         # Create verification window
         self.window = tk.Toplevel(parent)
@@ -1113,7 +2521,7 @@ class VerificationDialog:
         try:
             self.log("Initializing browser for verification...")
             # Initialize browser
-            self.driver = init_driver(headless=False, parent=self.parent)
+            self.driver = DRIVER_POOL.lease(headless=False, parent=self.parent, capture_network=True)
             self.driver.get(self.config['url'])
             time.sleep(1)
             self.log(f"Browser opened: {self.config['url']}")
@@ -1134,7 +2542,8 @@ class VerificationDialog:
                 self.main_log(f"[VERIFY ERROR] {error_msg}\n{full_trace}")
             messagebox.showerror("Verification Failed", error_msg)
             if self.driver:
-                self.driver.quit()
+                DRIVER_POOL.release(self.driver)
+                self.driver = None
             return False, []
     
     def show_step(self):
@@ -1276,10 +2685,18 @@ class VerificationDialog:
                 EC.presence_of_element_located((by, selector))
             )
             
-            # Get all option texts
-            from selenium.webdriver.support.ui import Select
-            select_obj = Select(select_el)
-            options = [opt.text.strip() for opt in select_obj.options if opt.text.strip()]
+            # Get all option texts and their submitted values (one round trip)
+            pairs = self.driver.execute_script(
+                "return Array.prototype.map.call(arguments[0].options, function(o) { return [o.text.trim(), o.value]; });",
+                select_el
+            ) or []
+            options = [text for text, _ in pairs if text]
+            
+            # Remember options so row-level batch inference can offer them to the LLM,
+            # and their values so the HTTP fast path posts what the browser would
+            if options and len(options) <= 100:
+                action.setdefault('field_context', {})['options'] = options
+                action['field_context']['option_values'] = {text: value for text, value in pairs if text}
             
             # Create combobox
             self.override_combo = ttk.Combobox(
@@ -1321,6 +2738,18 @@ class VerificationDialog:
         
         self.override_var.set(current_value)
     
+    def inferred_row_values(self):
+        """
+        Row-level inference for the test row, requested once per dialog. Goes
+        through infer_row_values like replay, so the preview shows what replay
+        sends and replay reuses the cached answer.
+        """
+        if self._row_inference is None:
+            hits_before = LLM_CACHE.hits
+            values = infer_row_values(self.config, self.test_series)
+            self._row_inference = (values, LLM_CACHE.hits > hits_before)
+        return self._row_inference
+
     def get_value_and_source(self, action, csv_col):
         """Determine what value will be used and why."""
         value = ""
@@ -1331,24 +2760,23 @@ class VerificationDialog:
             value = str(action.get('value', ''))
             source = "Recorded Value (from your demo)"
         elif csv_col and csv_col in self.test_row:
-            # Handle blank/NaN values properly
-            raw_value = self.test_row[csv_col]
-            if pd.isna(raw_value):
-                value = ''
-            else:
-                value = str(raw_value)
+            # Same normalization as replay (NaN -> '', trim, state abbreviations, option text)
+            value = csv_cell_value(action, csv_col, self.test_row[csv_col])
             source = f"CSV Column: {csv_col}"
         else:
             # Would use LLM - simulate it
             field_context = action.get('field_context', {})
-            config = load_llm_config()
+            config = LLM_SERVICE.config()
             
             if config.get('enabled'):
-                # Try to get LLM suggestion
-                llm_value = infer_field_value_with_llm(field_context, self.test_row)
+                # Same row-level request (and cache entry) as replay
+                inferred, from_cache = self.inferred_row_values()
+                llm_value = inferred.get(action.get('selector'))
                 if llm_value:
                     value = llm_value
                     source = "LLM Inference (AI-powered)"
+                    if from_cache:
+                        source += " - cached"
                     reasoning = f"LLM analyzed CSV data:\n"
                     for k, v in self.test_row.items():
                         reasoning += f"  - {k}: {v}\n"
@@ -1433,6 +2861,7 @@ class VerificationDialog:
             
             # Execute the action (keyboard, click, navigate, input, select)
             self.execute_action(action)
+            drain_network_log(self.driver, self.network_requests, self.domain_types)
             
             # Save verified action with corrected value and name
             self.verified_actions.append(action)
@@ -2759,22 +4188,6 @@ class VerificationDialog:
             time.sleep(1)
         elif action_type == 'keyboard':
             # Execute keyboard action
-            from selenium.webdriver.common.keys import Keys
-            
-            # Map key names to Selenium Keys
-            key_map = {
-                'TAB': Keys.TAB,
-                'ENTER': Keys.ENTER,
-                'SPACE': Keys.SPACE,
-                'ARROW_DOWN': Keys.ARROW_DOWN,
-                'ARROW_UP': Keys.ARROW_UP,
-                'ARROW_LEFT': Keys.ARROW_LEFT,
-                'ARROW_RIGHT': Keys.ARROW_RIGHT,
-                'ESCAPE': Keys.ESCAPE,
-                'BACKSPACE': Keys.BACKSPACE,
-                'DELETE': Keys.DELETE,
-            }
-            
             # Check if new format (keys array) or old format (single key + repeat)
             if 'keys' in action:
                 # New format: list of keys to press in sequence
@@ -2782,21 +4195,21 @@ class VerificationDialog:
                 try:
                     active_element = self.driver.switch_to.active_element
                     for key_name in keys_sequence:
-                        selenium_key = key_map.get(key_name, Keys.TAB)
+                        selenium_key = KEY_MAP.get(key_name, Keys.TAB)
                         active_element.send_keys(selenium_key)
                         time.sleep(0.3)
                 except Exception as e:
                     # Fallback: send to body
                     body = self.driver.find_element(By.TAG_NAME, 'body')
                     for key_name in keys_sequence:
-                        selenium_key = key_map.get(key_name, Keys.TAB)
+                        selenium_key = KEY_MAP.get(key_name, Keys.TAB)
                         body.send_keys(selenium_key)
                         time.sleep(0.3)
             else:
                 # Old format: single key with repeat count
                 key_name = action.get('key', 'TAB')
                 repeat = action.get('repeat', 1)
-                selenium_key = key_map.get(key_name, Keys.TAB)
+                selenium_key = KEY_MAP.get(key_name, Keys.TAB)
                 
                 try:
                     active_element = self.driver.switch_to.active_element
@@ -2813,21 +4226,12 @@ class VerificationDialog:
             time.sleep(0.5)  # Wait for page to respond
         elif action_type == 'interactive_sequence':
             # Execute sequence of keyboard + click actions
-            from selenium.webdriver.common.keys import Keys
-            
-            key_map = {
-                'TAB': Keys.TAB, 'ENTER': Keys.ENTER, 'SPACE': Keys.SPACE,
-                'ARROW_DOWN': Keys.ARROW_DOWN, 'ARROW_UP': Keys.ARROW_UP,
-                'ARROW_LEFT': Keys.ARROW_LEFT, 'ARROW_RIGHT': Keys.ARROW_RIGHT,
-                'ESCAPE': Keys.ESCAPE, 'BACKSPACE': Keys.BACKSPACE, 'DELETE': Keys.DELETE,
-            }
-            
             actions_list = action.get('actions', [])
             for act in actions_list:
                 if isinstance(act, dict):
                     if act.get('type') == 'keyboard':
                         key_name = act.get('key')
-                        selenium_key = key_map.get(key_name, Keys.TAB)
+                        selenium_key = KEY_MAP.get(key_name, Keys.TAB)
                         try:
                             active_element = self.driver.switch_to.active_element
                             active_element.send_keys(selenium_key)
@@ -2916,7 +4320,6 @@ class VerificationDialog:
                 el
             )
         elif action_type == 'select':
-            from selenium.webdriver.support.ui import Select
             el = WebDriverWait(self.driver, 10).until(
                 EC.presence_of_element_located((by, selector))
             )
@@ -3000,6 +4403,25 @@ class VerificationDialog:
             verified_config['actions'] = self.verified_actions
             verified_config['verification_complete'] = True
             
+            # Compile the final form submission into an HTTP fast path
+            if self.driver:
+                drain_network_log(self.driver, self.network_requests, self.domain_types)
+            template = compile_http_template(self.network_requests, self.test_row, verified_config)
+            if template:
+                verified_config['http_template'] = template
+                self.log(f"Compiled HTTP fast path: POST {template['url']} ({len(template['placeholders'])} CSV placeholders)")
+            else:
+                verified_config.pop('http_template', None)
+                if verified_config.get('loop_start_step', 0) > 0:
+                    self.log("HTTP fast path not compiled: the workflow has a login/setup prefix - runs will use the browser")
+                else:
+                    self.log("No replayable form submission captured - runs will use the browser")
+            if self.domain_types:
+                policy = learn_resource_policy(self.domain_types, self.config.get('url'), verified_config.get('resource_policy') or {})
+                verified_config['resource_policy'] = policy
+                self.log(f"Resource policy learned: {len(policy['needed_domains'])} needed domains, "
+                         f"{len(policy['learned_block_domains'])} blockable: {policy['learned_block_domains']}")
+            
             # Save deleted steps if user chose to keep them
             if self.deleted_steps:
                 verified_config['deleted_steps_archive'] = self.deleted_steps
@@ -3055,10 +4477,8 @@ class VerificationDialog:
                 self.log(f"Warning: Failed to save progress: {e}")
         
         if self.driver:
-            try:
-                self.driver.quit()
-            except Exception:
-                pass
+            DRIVER_POOL.release(self.driver)
+            self.driver = None
         self.window.destroy()
 
 # -------------------------
@@ -3100,255 +4520,974 @@ def save_prefs(data: dict):
     except Exception:
         pass
 
+# -------------------------
+# Page Readiness (adaptive pacing)
+# -------------------------
+
+# Pacing profiles control how replay waits between steps. Instead of fixed
+# sleeps, each step waits until the page is ready (document loaded, no pending
+# XHR/fetch, DOM quiet for quiet_ms). min_delay is a floor for sites that need
+# throttling; key_delay paces individual keystrokes.
+PACING_PROFILES = {
+    'fast': {'timeout': 5, 'quiet_ms': 100, 'poll': 0.05, 'min_delay': 0.0, 'key_delay': 0.0},
+    'balanced': {'timeout': 10, 'quiet_ms': 250, 'poll': 0.1, 'min_delay': 0.0, 'key_delay': 0.0},
+    'throttled': {'timeout': 15, 'quiet_ms': 500, 'poll': 0.1, 'min_delay': 0.5, 'key_delay': 0.3},
+}
+DEFAULT_PACING_PROFILE = 'balanced'
+
+# Installs (once per document) an XHR/fetch counter and a MutationObserver on
+# the DOM structure (childList only - attribute/text churn from spinners,
+# carousels and clocks would never go quiet). Registered for every new document
+# so requests started by the action itself are counted.
+READINESS_HOOK_SCRIPT = r"""
+(function(){
+  var r = window._lgReady;
+  if (!r) {
+    r = window._lgReady = {pending: 0, lastMutation: Date.now()};
+    try {
+      var origSend = XMLHttpRequest.prototype.send;
+      XMLHttpRequest.prototype.send = function(){
+        r.pending++;
+        this.addEventListener('loadend', function(){ r.pending = Math.max(0, r.pending - 1); });
+        return origSend.apply(this, arguments);
+      };
+    } catch(e) {}
+    try {
+      if (window.fetch) {
+        var origFetch = window.fetch;
+        window.fetch = function(){
+          r.pending++;
+          return origFetch.apply(this, arguments).finally(function(){ r.pending = Math.max(0, r.pending - 1); });
+        };
+      }
+    } catch(e) {}
+    try {
+      new MutationObserver(function(){ r.lastMutation = Date.now(); })
+        .observe(document, {childList: true, subtree: true});
+    } catch(e) {}
+  }
+})();
+"""
+
+# Reports readiness (installing the hooks if this document has none yet). One round trip per poll.
+READINESS_PROBE_SCRIPT = READINESS_HOOK_SCRIPT + """
+var r = window._lgReady;
+return {state: document.readyState, pending: r.pending, idle: Date.now() - r.lastMutation};
+"""
+
+# Once this long has passed, a loaded page with no pending requests counts as
+# ready even if the DOM keeps changing (live widgets, tickers).
+READINESS_QUIET_CAP = 2.0
+
+def install_readiness_hooks(driver):
+    """Register the readiness hooks for every new document of this driver (once; needs CDP)."""
+    if getattr(driver, '_lg_readiness_hooked', False):
+        return
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': READINESS_HOOK_SCRIPT})
+    except Exception:
+        pass  # No CDP - hooks are installed by the first probe on each document
+    try:
+        driver._lg_readiness_hooked = True
+    except Exception:
+        pass
+
+def get_pacing_profile(config):
+    """
+    Resolve the workflow's pacing profile.
+
+    config['pacing_profile'] may be a profile name ('fast', 'balanced',
+    'throttled') or a dict like {'profile': 'balanced', 'min_delay': 1.0}
+    whose keys override the named profile.
+    """
+    setting = config.get('pacing_profile') or DEFAULT_PACING_PROFILE
+    if isinstance(setting, str):
+        return dict(PACING_PROFILES.get(setting, PACING_PROFILES[DEFAULT_PACING_PROFILE]))
+    base = dict(PACING_PROFILES.get(setting.get('profile'), PACING_PROFILES[DEFAULT_PACING_PROFILE]))
+    for key in base:
+        if setting.get(key) is not None:
+            base[key] = float(setting[key])
+    return base
+
+def wait_for_page_ready(driver, pacing):
+    """
+    Wait until the page is ready: document.readyState is 'complete', no XHR/fetch
+    requests are pending and the DOM structure has been quiet for
+    pacing['quiet_ms'] (or READINESS_QUIET_CAP seconds have passed).
+    Gives up after pacing['timeout'] seconds and always waits at least
+    pacing['min_delay'] seconds.
+    """
+    install_readiness_hooks(driver)
+    start = time.time()
+    deadline = start + pacing['timeout']
+    quiet_cap = start + min(READINESS_QUIET_CAP, pacing['timeout'])
+    while time.time() < deadline:
+        try:
+            probe = driver.execute_script(READINESS_PROBE_SCRIPT)
+        except Exception:
+            # Page is mid-navigation (or an alert is open) - try again shortly
+            probe = None
+        if probe and probe.get('state') == 'complete' and not probe.get('pending') and (
+                probe.get('idle', 0) >= pacing['quiet_ms'] or time.time() >= quiet_cap):
+            break
+        time.sleep(pacing['poll'])
+    remaining = pacing['min_delay'] - (time.time() - start)
+    if remaining > 0:
+        time.sleep(remaining)
+    return time.time() - start
+
+def pace_keystroke(pacing):
+    """Pause between individual keystrokes (only for throttled profiles)."""
+    if pacing['key_delay'] > 0:
+        time.sleep(pacing['key_delay'])
+
+# -------------------------
+# Resource Policy (request blocking)
+# -------------------------
+
+# config['resource_policy'] controls which requests replay browsers skip:
+#   {'enabled': True, 'block_types': ['image', 'font', 'media'],
+#    'block_trackers': True, 'block_patterns': ['*example-ads.com*'],
+#    'learn': True, 'needed_domains': [...], 'learned_block_domains': [...]}
+# Blocking uses Network.setBlockedURLs (wildcard URL patterns). With 'learn'
+# set, verification records the domains the workflow contacts and blocks
+# third-party domains that only served images/fonts/media/beacons.
+RESOURCE_TYPE_PATTERNS = {
+    'image': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp', '*.avif'],
+    'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'media': ['*.mp4', '*.webm', '*.mp3', '*.ogg', '*.wav', '*.m3u8'],
+    'stylesheet': ['*.css'],
+}
+TRACKER_URL_PATTERNS = [
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*adservice.google.*', '*connect.facebook.net*', '*facebook.com/tr*', '*hotjar.com*', '*clarity.ms*',
+    '*segment.io*', '*segment.com/analytics*', '*mixpanel.com*', '*fullstory.com*', '*bat.bing.com*',
+    '*linkedin.com/px*', '*snap.licdn.com*', '*ads-twitter.com*', '*newrelic.com*', '*nr-data.net*',
+]
+DEFAULT_RESOURCE_POLICY = {'enabled': False, 'block_types': ['image', 'font', 'media'], 'block_trackers': True}
+# Request types whose domains a workflow is considered to need
+NEEDED_REQUEST_TYPES = ('Document', 'Script', 'XHR', 'Fetch', 'Stylesheet', 'WebSocket', 'EventSource')
+
+def get_resource_policy(config):
+    """Workflow resource policy merged over DEFAULT_RESOURCE_POLICY."""
+    policy = dict(DEFAULT_RESOURCE_POLICY)
+    policy.update(config.get('resource_policy') or {})
+    return policy
+
+def resource_block_patterns(policy):
+    """URL patterns to block for a policy ([] when disabled)."""
+    if not policy.get('enabled'):
+        return []
+    patterns = []
+    for resource_type in policy.get('block_types', []):
+        for pattern in RESOURCE_TYPE_PATTERNS.get(resource_type, []):
+            # Patterns match the whole URL: also cover cache-busting query strings
+            # ('*.png?*'; not '*.png*', which would block e.g. cdn.iconify.design/x.js for '*.ico*')
+            patterns.extend([pattern, pattern + '?*'])
+    if policy.get('block_trackers'):
+        patterns.extend(TRACKER_URL_PATTERNS)
+    patterns.extend(f'*://{domain}/*' for domain in policy.get('learned_block_domains', []))
+    patterns.extend(policy.get('block_patterns', []))
+    return list(dict.fromkeys(patterns))
+
+def apply_resource_policy(driver, config):
+    """Install the workflow's URL blocklist on the driver; returns the number of patterns."""
+    patterns = resource_block_patterns(get_resource_policy(config))
+    if not patterns:
+        return 0
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    except Exception as e:
+        print(f"Could not apply resource policy: {e}")
+        return 0
+    return len(patterns)
+
+def learn_resource_policy(domain_types, site_url, policy):
+    """
+    Update a policy from domains seen during verification ({domain: set(request types)}).
+    The site's own domain and any domain that served documents/scripts/XHR is kept;
+    other third-party domains are added to learned_block_domains.
+    """
+    from urllib.parse import urlparse
+    site_host = urlparse(site_url or '').hostname or ''
+    site_root = '.'.join(site_host.split('.')[-2:])
+    needed, blockable = [], []
+    for domain, types in sorted(domain_types.items()):
+        same_site = domain == site_host or (site_root and (domain == site_root or domain.endswith('.' + site_root)))
+        if same_site or set(types) & set(NEEDED_REQUEST_TYPES):
+            needed.append(domain)
+        else:
+            blockable.append(domain)
+    policy = dict(policy)
+    policy['needed_domains'] = needed
+    policy['learned_block_domains'] = blockable
+    policy['learned_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    return policy
+
+# -------------------------
+# Session Snapshots
+# -------------------------
+
+# After a fresh browser runs the setup prefix (steps before loop_start_step,
+# typically login), its cookies plus localStorage/sessionStorage and the
+# current URL are saved to configs/{site}_session.json. Later drivers restore
+# that snapshot and start directly at loop_start_step; if the snapshot is too
+# old, a cookie has expired, or the site bounces us elsewhere, the snapshot is
+# discarded and the full workflow runs.
+SESSION_SNAPSHOT_TTL = 12 * 3600  # seconds (config['session_snapshot_ttl'])
+
+STORAGE_DUMP_SCRIPT = """
+function dump(s) { var o = {}; try { for (var i = 0; i < s.length; i++) { var k = s.key(i); o[k] = s.getItem(k); } } catch (e) {} return o; }
+return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+
+def _session_snapshot_path(config):
+    return os.path.join('configs', f"{config.get('site_name', 'workflow')}_session.json")
+
+def session_snapshots_enabled(config):
+    return config.get('session_snapshot', True) and config.get('loop_start_step', 0) > 0
+
+def save_session_snapshot(driver, config):
+    """Capture cookies, storage and URL at the loop start point."""
+    try:
+        storage = driver.execute_script(STORAGE_DUMP_SCRIPT) or {}
+        snapshot = {
+            'captured_at': time.time(),
+            'url': driver.current_url,
+            'loop_start_step': config.get('loop_start_step', 0),
+            'cookies': driver.get_cookies(),
+            'local_storage': storage.get('local', {}),
+            'session_storage': storage.get('session', {}),
+        }
+        path = _session_snapshot_path(config)
+        os.makedirs('configs', exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        print(f"Error saving session snapshot: {e}")
+        return False
+
+def load_session_snapshot(config):
+    """Return the site's snapshot if it is still usable, else None (expired ones are deleted)."""
+    path = _session_snapshot_path(config)
+    try:
+        with open(path, 'r') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    now = time.time()
+    ttl = config.get('session_snapshot_ttl', SESSION_SNAPSHOT_TTL)
+    expired = (
+        now - snapshot.get('captured_at', 0) > ttl
+        or snapshot.get('loop_start_step') != config.get('loop_start_step', 0)
+        or any(c.get('expiry') and c['expiry'] < now for c in snapshot.get('cookies', []))
+    )
+    if expired:
+        discard_session_snapshot(config)
+        return None
+    return snapshot
+
+def discard_session_snapshot(config):
+    try:
+        os.remove(_session_snapshot_path(config))
+    except OSError:
+        pass
+
+def restore_session_snapshot(driver, config, pacing, log_callback=None):
+    """
+    Load the snapshot into a fresh driver and open the loop start page.
+    Returns True when the page looks right; otherwise resets the browser to the
+    workflow URL, discards the snapshot and returns False.
+    """
+    snapshot = load_session_snapshot(config)
+    if not snapshot:
+        return False
+    try:
+        cookies = []
+        for c in snapshot.get('cookies', []):
+            cookie = {k: c[k] for k in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly') if k in c}
+            if c.get('expiry'):
+                cookie['expires'] = c['expiry']
+            if c.get('sameSite') in ('Strict', 'Lax', 'None'):
+                cookie['sameSite'] = c['sameSite']
+            cookies.append(cookie)
+        driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+        # Seed storage before any page script runs on the snapshot's origin
+        seed = (
+            "(function(l, s){ try { if (location.href.indexOf(%s) !== 0) return;"
+            " for (var k in l) localStorage.setItem(k, l[k]); for (var k2 in s) sessionStorage.setItem(k2, s[k2]); } catch (e) {} })(%s, %s);"
+        ) % (json.dumps(_url_origin(snapshot['url'])), json.dumps(snapshot.get('local_storage', {})), json.dumps(snapshot.get('session_storage', {})))
+        script_id = driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': seed}).get('identifier')
+        try:
+            driver.get(snapshot['url'])
+            wait_for_page_ready(driver, pacing)
+        finally:
+            if script_id:
+                driver.execute_cdp_cmd('Page.removeScriptToEvaluateOnNewDocument', {'identifier': script_id})
+        if _session_page_valid(driver, config, snapshot):
+            if log_callback:
+                log_callback(f"Restored saved session - skipping to step {config.get('loop_start_step', 0) + 1}")
+            return True
+        if log_callback:
+            log_callback("Saved session no longer valid - running full login/setup")
+    except Exception as e:
+        if log_callback:
+            log_callback(f"Session restore failed ({e}) - running full login/setup")
+    discard_session_snapshot(config)
+    try:
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+    except Exception:
+        pass
+    if config.get('url'):
+        driver.get(config['url'])
+        wait_for_page_ready(driver, pacing)
+    return False
+
+def _url_origin(url):
+    from urllib.parse import urlparse
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+def _session_page_valid(driver, config, snapshot):
+    """We must land on the snapshot page (not a login redirect) with the loop start element present."""
+    from urllib.parse import urlparse
+    current, expected = urlparse(driver.current_url), urlparse(snapshot['url'])
+    if (current.netloc, current.path.rstrip('/')) != (expected.netloc, expected.path.rstrip('/')):
+        return False
+    actions = config.get('actions', [])
+    loop_start = config.get('loop_start_step', 0)
+    action = actions[loop_start] if loop_start < len(actions) else {}
+    selector = action.get('selector')
+    if not selector or action.get('action') == 'navigate':
+        return True
+    try:
+        by = getattr(By, action.get('by', 'CSS_SELECTOR').upper())
+        WebDriverWait(driver, 5).until(EC.presence_of_element_located((by, selector)))
+        return True
+    except Exception:
+        return False
+
+# -------------------------
+# Workflow Plans
+# -------------------------
+
+# Workflows are compiled once per run into a WorkflowPlan (see below). For
+# selects the plan also keeps the option texts seen on the first row.
+LOCATOR_JS_BY = {By.CSS_SELECTOR: 'css', By.XPATH: 'xpath', By.ID: 'id', By.NAME: 'name'}
+
+LOCATOR_FIND_JS = """
+function lgFind(by, sel) {
+  try {
+    if (by === 'css') return document.querySelector(sel);
+    if (by === 'xpath') return document.evaluate(sel, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (by === 'id') return document.getElementById(sel);
+    if (by === 'name') return document.getElementsByName(sel)[0] || null;
+  } catch (e) {}
+  return null;
+}
+"""
+
+LOCATE_SCRIPT = LOCATOR_FIND_JS + """
+var interactable = arguments[2], el = lgFind(arguments[0], arguments[1]);
+if (!el) return null;
+if (interactable) {
+  var r = el.getBoundingClientRect(), st = window.getComputedStyle(el);
+  if ((r.width === 0 && r.height === 0) || st.visibility === 'hidden' || st.display === 'none' || el.disabled) return null;
+}
+return [el, el.tagName.toLowerCase()];
+"""
+
+# Fast fill: sets every field of a page in one script. Each field is
+# [js_by, selector, 'input'|'select', value]; returns one ok flag per field so
+# failures can fall back to the regular per-field path. Inputs go through the
+# native value setter so framework-controlled inputs (React etc.) see the change.
+FAST_FILL_SCRIPT = LOCATOR_FIND_JS + """
+var fields = arguments[0], out = [];
+function norm(t) { return (t || '').replace(/\\s+/g, ' ').trim(); }
+function fire(el, type) { el.dispatchEvent(new Event(type, {bubbles: true})); }
+for (var i = 0; i < fields.length; i++) {
+  var f = fields[i], el = lgFind(f[0], f[1]), v = f[3];
+  if (!el || el.disabled) { out.push(false); continue; }
+  if (f[2] === 'select') {
+    if (v === null || v === '') { out.push(true); continue; }
+    if (el.tagName !== 'SELECT') { out.push(false); continue; }
+    var found = false;
+    for (var j = 0; j < el.options.length; j++) {
+      if (norm(el.options[j].text) === norm(v)) {
+        if (el.selectedIndex !== j) { el.selectedIndex = j; fire(el, 'input'); fire(el, 'change'); }
+        found = true;
+        break;
+      }
+    }
+    out.push(found);
+    continue;
+  }
+  var proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype :
+              el instanceof HTMLInputElement ? HTMLInputElement.prototype : null;
+  if (!proto || el.readOnly) { out.push(false); continue; }
+  if (el.focus) el.focus();
+  Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, v === null ? '' : v);
+  fire(el, 'input');
+  fire(el, 'change');
+  if (el.blur) el.blur();
+  out.push(true);
+}
+return out;
+"""
+
+SELECT_OPTIONS_SCRIPT = """
+return Array.prototype.map.call(arguments[0].options, function(o) { return o.text.replace(/\\s+/g, ' ').trim(); });
+"""
+
+SELECT_BY_TEXT_SCRIPT = """
+var s = arguments[0], t = arguments[1].replace(/\\s+/g, ' ').trim();
+for (var i = 0; i < s.options.length; i++) {
+  if (s.options[i].text.replace(/\\s+/g, ' ').trim() === t) {
+    if (s.selectedIndex !== i) {
+      s.selectedIndex = i;
+      s.dispatchEvent(new Event('input', {bubbles: true}));
+      s.dispatchEvent(new Event('change', {bubbles: true}));
+    }
+    return true;
+  }
+}
+return false;
+"""
+
+# US State name to abbreviation mapping (shared by replay and verification)
+STATE_MAPPING = {
+    'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
+    'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'florida': 'FL', 'georgia': 'GA',
+    'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL', 'indiana': 'IN', 'iowa': 'IA',
+    'kansas': 'KS', 'kentucky': 'KY', 'louisiana': 'LA', 'maine': 'ME', 'maryland': 'MD',
+    'massachusetts': 'MA', 'michigan': 'MI', 'minnesota': 'MN', 'mississippi': 'MS', 'missouri': 'MO',
+    'montana': 'MT', 'nebraska': 'NE', 'nevada': 'NV', 'new hampshire': 'NH', 'new jersey': 'NJ',
+    'new mexico': 'NM', 'new york': 'NY', 'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH',
+    'oklahoma': 'OK', 'oregon': 'OR', 'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC',
+    'south dakota': 'SD', 'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT',
+    'virginia': 'VA', 'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY'
+}
+
+# Recorded key names to Selenium keys (unknown names fall back to TAB)
+KEY_MAP = {
+    'TAB': Keys.TAB, 'ENTER': Keys.ENTER, 'SPACE': Keys.SPACE,
+    'ARROW_DOWN': Keys.ARROW_DOWN, 'ARROW_UP': Keys.ARROW_UP,
+    'ARROW_LEFT': Keys.ARROW_LEFT, 'ARROW_RIGHT': Keys.ARROW_RIGHT,
+    'ESCAPE': Keys.ESCAPE, 'BACKSPACE': Keys.BACKSPACE, 'DELETE': Keys.DELETE,
+}
+
+FIELD_ACTIONS = ('input', 'select')
+
+class PlanStep:
+    """One compiled workflow action: everything that does not depend on the row."""
+    __slots__ = ('index', 'action', 'kind', 'desc', 'by', 'js_by', 'selector', 'csv_col', 'state_field',
+                 'recorded_value', 'field_context', 'real_keys', 'keys', 'sequence', 'url', 'handler',
+                 'submits', 'tag', 'options', 'option_lookup')
+
+    def __init__(self, index, action, csv_mapping):
+        self.index = index
+        self.action = action
+        self.kind = action.get('action')
+        self.desc = action.get('step_name') or f"{self.kind.upper() if self.kind else 'Unknown'} action"
+        self.by = getattr(By, (action.get('by') or 'CSS_SELECTOR').upper(), By.CSS_SELECTOR)
+        self.js_by = LOCATOR_JS_BY.get(self.by)
+        self.selector = action.get('selector')
+        self.csv_col = csv_mapping.get(self.selector) if self.selector else None
+        self.field_context = action.get('field_context') or {}
+        self.state_field = is_state_field(action, self.csv_col)
+        self.recorded_value = str(action.get('value', ''))
+        self.real_keys = bool(action.get('real_keys'))
+        self.url = action.get('url')
+        self.keys = None
+        self.sequence = None
+        if self.kind == 'keyboard':
+            if 'keys' in action:
+                # New format: list of keys recorded from browser
+                self.keys = [KEY_MAP.get(k, Keys.TAB) for k in action.get('keys', [])]
+            else:
+                # Old format: single key with repeat count
+                self.keys = [KEY_MAP.get(action.get('key', 'TAB'), Keys.TAB)] * action.get('repeat', 1)
+        elif self.kind == 'interactive_sequence':
+            self.sequence = []
+            for act in action.get('actions', []):
+                if not isinstance(act, dict):
+                    continue
+                if act.get('type') == 'keyboard':
+                    self.sequence.append(('keyboard', KEY_MAP.get(act.get('key'), Keys.TAB)))
+                elif act.get('type') == 'click' and act.get('selector'):
+                    self.sequence.append(('click', act['selector'], act.get('scrollY', 0)))
+        self.handler = None
+        # A click, or Enter in a key sequence, may send the form
+        self.submits = (self.kind == 'click'
+                        or Keys.ENTER in (self.keys or ())
+                        or any(a[0] == 'click' or a[1] == Keys.ENTER for a in self.sequence or ()))
+        # Learned on the first row and reused by later rows
+        self.tag = None
+        self.options = None
+        self.option_lookup = None
+
+class RowContext:
+    """Per-row state handed to WorkflowPlan step handlers."""
+    __slots__ = ('driver', 'row', 'values', 'inferred_values', 'pacing', 'log', '_row_dict')
+
+    def __init__(self, driver, row, values, inferred_values, pacing, log_callback):
+        self.driver = driver
+        self.row = row
+        self.values = values
+        self.inferred_values = inferred_values
+        self.pacing = pacing
+        self.log = log_callback
+        self._row_dict = None
+
+    @property
+    def row_dict(self):
+        if self._row_dict is None:
+            self._row_dict = self.row.to_dict()
+        return self._row_dict
+
+class WorkflowPlan:
+    """
+    A workflow compiled once per run and shared by all rows and workers:
+    PlanSteps with resolved locators, CSV columns, keys and a handler from the
+    dispatch table, plus the run-wide pacing and fast fill settings. Each row
+    then only resolves its values and talks to the browser.
+
+    Elements are located with a single execute_script per poll (presence +
+    visibility + enabled in one round trip) and selects are set by script
+    instead of Selenium's Select helper, which costs several round trips per
+    option.
+    """
+    def __init__(self, config):
+        self.config = config
+        self.actions = config['actions']
+        self.csv_mapping = config.get('csv_mapping')
+        self.pacing = get_pacing_profile(config)
+        self.fast_fill = bool(config.get('fast_fill'))
+        self.loop_start = config.get('loop_start_step', 0)
+        dispatch = {
+            'navigate': self._run_navigate,
+            'click': self._run_click,
+            'input': self._run_field,
+            'select': self._run_field,
+            'keyboard': self._run_keyboard,
+            'interactive_sequence': self._run_sequence,
+        }
+        self.steps = []
+        for idx, action in enumerate(self.actions):
+            step = PlanStep(idx, action, self.csv_mapping or {})
+            if step.selector or step.kind not in ('click',) + FIELD_ACTIONS:
+                step.handler = dispatch.get(step.kind)
+            self.steps.append(step)
+        # Failures from here on may come after the site already took the row
+        self.submit_index = max((s.index for s in self.steps if s.submits and s.handler), default=len(self.steps))
+
+    # --- Locators ---
+
+    def locate(self, driver, step, timeout=10, interactable=True):
+        """Wait for the step's element (visible and enabled if interactable) and return it."""
+        if step.js_by is None:
+            condition = EC.element_to_be_clickable if interactable else EC.presence_of_element_located
+            return WebDriverWait(driver, timeout).until(condition((step.by, step.selector)))
+
+        def probe(d):
+            try:
+                return d.execute_script(LOCATE_SCRIPT, step.js_by, step.selector, interactable) or False
+            except Exception:
+                return False  # Mid-navigation; poll again
+
+        el, tag = WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            probe, message=f"Element not found or not interactable: {step.selector}"
+        )
+        if step.tag is None:
+            step.tag = tag
+        return el
+
+    def options(self, driver, step, el, refresh=False):
+        """Non-empty option texts of a select, read once and cached for later rows."""
+        if step.options is None or refresh:
+            step.options = [t for t in driver.execute_script(SELECT_OPTIONS_SCRIPT, el) if t]
+            step.option_lookup = None
+        return step.options
+
+    def try_select(self, driver, step, el, text):
+        """Select an option by visible text in one round trip; False if there is no such option."""
+        return step.tag == 'select' and bool(driver.execute_script(SELECT_BY_TEXT_SCRIPT, el, text))
+
+    def select(self, driver, step, el, text):
+        """try_select, falling back to Selenium's Select after re-reading the options."""
+        if self.try_select(driver, step, el, text):
+            return
+        self.options(driver, step, el, refresh=True)
+        Select(el).select_by_visible_text(text)
+
+    # --- Values ---
+
+    def field_value(self, ctx, step, available_options=None, ask_llm=True):
+        """
+        Value for an input/select step: recorded, CSV column (value table) or
+        inferred. With ask_llm=False a select that would need the LLM returns
+        None instead, so the caller can re-read its options first.
+        """
+        if step.csv_col == '__RECORDED__':
+            return step.recorded_value
+        if step.index in ctx.values:
+            value = ctx.values[step.index]
+            if available_options and value and value not in available_options:
+                # Options learned after the value table was built
+                if step.option_lookup is None:
+                    step.option_lookup = option_index(available_options, step.state_field)
+                value = step.option_lookup.get(_norm_option_text(value), value)
+            return value
+        if step.kind == 'select':
+            llm_value = ctx.inferred_values.get(step.selector)
+            if llm_value is None or (llm_value and llm_value not in available_options):
+                if not ask_llm:
+                    return None
+                # Batch answer missing or not an exact option - ask with the real options
+                llm_value = infer_field_value_with_llm(step.field_context, ctx.row_dict, available_options=available_options)
+        elif step.selector in ctx.inferred_values:
+            llm_value = ctx.inferred_values[step.selector]
+        else:
+            llm_value = infer_field_value_with_llm(step.field_context, ctx.row_dict)
+        return llm_value if llm_value else step.recorded_value
+
+    # --- Fast fill ---
+
+    def fast_fill_group(self, start_idx, stop_idx):
+        """
+        Steps from start_idx that can be filled together by fast fill: the run
+        of consecutive input/select steps (same page, no clicks in between)
+        that can be located by script, are not marked real_keys and, for
+        selects, already have cached options (read on the first row). The
+        cached options are only a hint: a dependent dropdown may have reloaded
+        them, so misses fall back to fill_field, which re-reads them.
+
+        A group ends after a select: fields that depend on it (options loaded
+        over XHR on change) are filled after the page settles again.
+        """
+        group = []
+        for step in self.steps[start_idx:stop_idx]:
+            if step.kind not in FIELD_ACTIONS or step.handler is None or step.js_by is None or step.real_keys:
+                break
+            if step.kind == 'select' and step.options is None and step.csv_col != '__RECORDED__':
+                break
+            group.append(step)
+            if step.kind == 'select':
+                break
+        return group
+
+    def fill_fast(self, ctx, group):
+        """
+        Fill consecutive fields with one script; failed fields fall back to
+        fill_field. The group is cut at the first select that needs the LLM
+        (it is asked with the live options by fill_field). Returns the index
+        of the first step not filled.
+        """
+        start_idx = group[0].index
+        fields = []
+        for step in group:
+            value = self.field_value(ctx, step, step.options, ask_llm=False)
+            if value is None:
+                break
+            if step is not group[0] and ctx.log:
+                ctx.log(f"Step {step.index + 1}: {step.desc}")
+            fields.append([step.js_by, step.selector, step.kind, value])
+        group = group[:len(fields)]
+        if not group:
+            return start_idx
+        self.locate(ctx.driver, group[0])  # The page has reached the form
+        results = ctx.driver.execute_script(FAST_FILL_SCRIPT, fields) or []
+        settled = False
+        for pos, step in enumerate(group):
+            if pos >= len(results) or not results[pos]:
+                if not settled:
+                    # Let requests started by the filled fields finish before retrying
+                    wait_for_page_ready(ctx.driver, ctx.pacing)
+                    settled = True
+                if ctx.log:
+                    ctx.log(f"Step {step.index + 1}: fast fill failed, filling field directly")
+                self.fill_field(ctx, step)
+        return group[-1].index + 1
+
+    def fill_field(self, ctx, step):
+        """Fill one input/select through WebDriver (real keystrokes for inputs)."""
+        if step.kind == 'input':
+            # Wait until the field is interactable, not merely present
+            el = self.locate(ctx.driver, step)
+            value = self.field_value(ctx, step)
+            el.clear()
+            if value:  # Only send keys if value is not empty
+                el.send_keys(value)
+        else:
+            el = self.locate(ctx.driver, step, interactable=False)
+            # Option texts are read once per run and reused for later rows
+            cached = step.options is not None
+            available_options = self.options(ctx.driver, step, el)
+            value = self.field_value(ctx, step, available_options, ask_llm=False)
+            if value is not None and (not value or self.try_select(ctx.driver, step, el, value)):
+                return
+            # No such option: a dependent dropdown may have reloaded its options since
+            # they were cached, so re-read them before resolving (and asking the LLM)
+            if cached:
+                available_options = self.options(ctx.driver, step, el, refresh=True)
+            value = self.field_value(ctx, step, available_options)
+            if value:
+                self.select(ctx.driver, step, el, value)
+
+    # --- Step handlers (dispatch table) ---
+
+    def _run_navigate(self, ctx, step):
+        if step.url:
+            ctx.driver.get(step.url)
+            wait_for_page_ready(ctx.driver, ctx.pacing)
+
+    def _run_click(self, ctx, step):
+        el = self.locate(ctx.driver, step)
+        # Click with stale element retry (same as verify workflow)
+        try:
+            el.click()
+        except Exception as e:
+            if 'stale' not in str(e).lower():
+                raise
+            if ctx.log:
+                ctx.log("Element became stale, re-finding...")
+            self.locate(ctx.driver, step, timeout=5).click()
+        wait_for_page_ready(ctx.driver, ctx.pacing)
+
+    def _run_field(self, ctx, step):
+        self.fill_field(ctx, step)
+        wait_for_page_ready(ctx.driver, ctx.pacing)
+
+    def _run_keyboard(self, ctx, step):
+        active_element = ctx.driver.switch_to.active_element
+        for key in step.keys:
+            active_element.send_keys(key)
+            pace_keystroke(ctx.pacing)
+        wait_for_page_ready(ctx.driver, ctx.pacing)
+
+    def _run_sequence(self, ctx, step):
+        # Interactive sequence (keyboard + clicks)
+        driver = ctx.driver
+        for item in step.sequence:
+            if item[0] == 'keyboard':
+                try:
+                    driver.switch_to.active_element.send_keys(item[1])
+                except Exception:
+                    driver.find_element(By.TAG_NAME, 'body').send_keys(item[1])
+                pace_keystroke(ctx.pacing)
+            else:
+                _, selector, scroll_y = item
+                try:
+                    if scroll_y:
+                        driver.execute_script(f"window.scrollTo(0, {scroll_y});")
+                    WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector))).click()
+                    wait_for_page_ready(driver, ctx.pacing)
+                except Exception as e:
+                    if ctx.log:
+                        ctx.log(f"Click failed: {e}")
+        wait_for_page_ready(driver, ctx.pacing)
+
+WORKFLOW_PLAN_CACHE_SIZE = 8
+_workflow_plans = OrderedDict()
+_workflow_plans_lock = threading.Lock()
+
+def get_workflow_plan(config):
+    """
+    Return the WorkflowPlan for this config, compiling it on first use. Plans
+    are keyed by the config object, so every row and worker of a run shares
+    one; editing the workflow produces a new actions list/mapping and a new plan.
+    """
+    with _workflow_plans_lock:
+        plan = _workflow_plans.get(id(config))
+        if (plan is None or plan.config is not config or plan.actions is not config['actions']
+                or plan.csv_mapping is not config.get('csv_mapping')):
+            plan = WorkflowPlan(config)
+            _workflow_plans[id(config)] = plan
+            while len(_workflow_plans) > WORKFLOW_PLAN_CACHE_SIZE:
+                _workflow_plans.popitem(last=False)
+        else:
+            _workflow_plans.move_to_end(id(config))
+        return plan
+
+# -------------------------
+# Value Table (vectorized CSV values)
+# -------------------------
+
+# Mapped CSV values are resolved for a whole batch of rows before replay:
+# NaN -> '', trimmed, state names -> abbreviations for state fields and, for
+# dropdowns with known options, canonicalized to the exact option text.
+# The replay engine then just reads {step index: value} for each row.
+STATE_NAMES = {abbr: name for name, abbr in STATE_MAPPING.items()}
+
+def is_state_field(action, csv_col):
+    """State fields get state names converted to abbreviations."""
+    field_id = ((action.get('field_context') or {}).get('id') or '').lower()
+    return bool(csv_col) and ('state' in field_id or 'state' in csv_col.lower())
+
+def _norm_option_text(text):
+    return ' '.join(str(text).split()).lower()
+
+def option_index(options, state_field=False):
+    """
+    Normalized text -> exact option text for a dropdown. For state fields,
+    state names and abbreviations also resolve to whichever form the dropdown
+    uses (elsewhere 'Ms' or 'In' must not match Mississippi or Indiana).
+    """
+    index = {}
+    for opt in options:
+        index.setdefault(_norm_option_text(opt), opt)
+    if not state_field:
+        return index
+    for opt in options:
+        key = _norm_option_text(opt)
+        if key in STATE_MAPPING:
+            index.setdefault(STATE_MAPPING[key].lower(), opt)
+        elif key.upper() in STATE_NAMES:
+            index.setdefault(STATE_NAMES[key.upper()], opt)
+    return index
+
+def normalize_column(values, state_field=False, options=None):
+    """Vectorized normalization of one mapped CSV column (a Series) to replay values."""
+    out = values.astype(str).where(values.notna(), '').str.strip()
+    if state_field:
+        out = out.str.lower().map(STATE_MAPPING).fillna(out)
+    if options:
+        out = out.str.lower().str.replace(r'\s+', ' ', regex=True).map(option_index(options, state_field)).fillna(out)
+    return out
+
+def csv_cell_value(action, csv_col, raw_value):
+    """normalize_column for a single cell (verification preview)."""
+    options = (action.get('field_context') or {}).get('options') if action.get('action') == 'select' else None
+    return normalize_column(pd.Series([raw_value], dtype=object), is_state_field(action, csv_col), options).iloc[0]
+
+class ValueTable:
+    """
+    Mapped CSV values for a batch of rows (build_value_table): one object
+    array with a column per mapped step, looked up by row position.
+    """
+    def __init__(self, index, step_indices, values):
+        self.index = index
+        self.step_indices = step_indices
+        self.values = values
+
+    def row_at(self, pos):
+        """{step index: value} for the row at position pos."""
+        return dict(zip(self.step_indices, self.values[pos]))
+
+    def get(self, row_idx):
+        """{step index: value} for the row labelled row_idx, or None if not in the batch."""
+        try:
+            pos = self.index.get_loc(row_idx)
+        except KeyError:
+            return None
+        return self.row_at(pos) if isinstance(pos, int) else None
+
+def build_value_table(config, df):
+    """
+    Resolve every CSV-mapped input/select value for the rows of df at once
+    (pass only the rows that will run). Steps that are recorded or unmapped
+    (LLM inference) are left out and resolved by the replay.
+    """
+    plan = get_workflow_plan(config)
+    columns = {}
+    for step in plan.steps:
+        if step.kind not in FIELD_ACTIONS or step.handler is None:
+            continue
+        if step.csv_col and step.csv_col != '__RECORDED__' and step.csv_col in df.columns:
+            options = (step.options or step.field_context.get('options')) if step.kind == 'select' else None
+            columns[step.index] = normalize_column(df[step.csv_col], step.state_field, options)
+    values = pd.DataFrame(columns, index=df.index).to_numpy(dtype=object)
+    return ValueTable(df.index, list(columns), values)
+
 # -------------------------
 # Replay Automation
 # -------------------------
 
-def replay_workflow_single_row(driver, config, row, log_callback=None, row_idx=0, session_iteration=1):
+class PossiblySubmittedError(RuntimeError):
+    """A row failed on or after its last submitting step; replaying it could submit twice."""
+
+def replay_workflow_single_row(driver, config, row, log_callback=None, row_idx=0, session_iteration=1, inferred_values=None,
+                               row_values=None):
     """Replay workflow for a single row with an already-initialized driver.
     
     Args:
         session_iteration: Which iteration in THIS browser session (1=first, 2=second, etc)
+        inferred_values: selector -> value for unmapped fields from the row-level
+            inference stage (infer_row_values). Computed here when not provided.
+        row_values: this row's values from build_value_table (ValueTable.get).
+            Computed here when not provided.
     """
-    csv_row_dict = row.to_dict()
+    plan = get_workflow_plan(config)
     
-    # US State name to abbreviation mapping
-    STATE_MAPPING = {
-        'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
-        'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'florida': 'FL', 'georgia': 'GA',
-        'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL', 'indiana': 'IN', 'iowa': 'IA',
-        'kansas': 'KS', 'kentucky': 'KY', 'louisiana': 'LA', 'maine': 'ME', 'maryland': 'MD',
-        'massachusetts': 'MA', 'michigan': 'MI', 'minnesota': 'MN', 'mississippi': 'MS', 'missouri': 'MO',
-        'montana': 'MT', 'nebraska': 'NE', 'nevada': 'NV', 'new hampshire': 'NH', 'new jersey': 'NJ',
-        'new mexico': 'NM', 'new york': 'NY', 'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH',
-        'oklahoma': 'OK', 'oregon': 'OR', 'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC',
-        'south dakota': 'SD', 'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT',
-        'virginia': 'VA', 'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY'
-    }
+    if row_values is None:
+        row_values = build_value_table(config, row.to_frame().T).row_at(0)
+    # Row-level inference: one LLM request for every unmapped field
+    if inferred_values is None:
+        inferred_values = infer_row_values(config, row)
+    ctx = RowContext(driver, row, row_values, inferred_values, plan.pacing, log_callback)
     
     # Determine which steps to execute
-    loop_start = config.get('loop_start_step', 0)
-    actions_to_execute = config['actions']
+    loop_start = plan.loop_start
     start_idx = 0
+    capture_snapshot = False
     
     if session_iteration > 1 and loop_start > 0:
         # On 2nd+ iterations IN THIS SESSION, start from loop point
         start_idx = loop_start
-        actions_to_execute = config['actions'][loop_start:]
         if log_callback:
             log_callback(f"Starting from step {loop_start + 1} (skipping login/setup steps)")
+    elif session_snapshots_enabled(config):
+        # New browser: reuse a saved login/setup session if there is one
+        if restore_session_snapshot(driver, config, plan.pacing, log_callback):
+            start_idx = loop_start
+        else:
+            capture_snapshot = True
     
-    for step_idx, action in enumerate(actions_to_execute, start=start_idx):
+    # Fast fill groups never run past the snapshot point
+    fill_until = 0
+    fill_stop = loop_start if capture_snapshot else len(plan.steps)
+    
+    for step in plan.steps[start_idx:]:
+        step_idx = step.index
+        if step_idx < fill_until:
+            continue  # Already filled as part of a fast fill group
+        if capture_snapshot and step_idx == loop_start:
+            # Setup prefix done - save the session for future browsers
+            if save_session_snapshot(driver, config) and log_callback:
+                log_callback(f"Saved session snapshot at step {loop_start + 1}")
+            fill_stop = len(plan.steps)
         try:
-            action_type = action.get('action')
-            step_name = action.get('step_name', '')
-            
-            # Log step
-            step_desc = step_name if step_name else f"{action_type.upper() if action_type else 'Unknown'} action"
             if log_callback:
-                log_callback(f"Step {step_idx + 1}: {step_desc}")
-            
-            if action_type == 'interactive_sequence':
-                # Handle interactive sequence (keyboard + clicks)
-                from selenium.webdriver.common.keys import Keys
-                
-                key_map = {
-                    'TAB': Keys.TAB, 'ENTER': Keys.ENTER, 'SPACE': Keys.SPACE,
-                    'ARROW_DOWN': Keys.ARROW_DOWN, 'ARROW_UP': Keys.ARROW_UP,
-                    'ARROW_LEFT': Keys.ARROW_LEFT, 'ARROW_RIGHT': Keys.ARROW_RIGHT,
-                    'ESCAPE': Keys.ESCAPE, 'BACKSPACE': Keys.BACKSPACE, 'DELETE': Keys.DELETE,
-                }
-                
-                actions_list = action.get('actions', [])
-                for act in actions_list:
-                    if isinstance(act, dict):
-                        if act.get('type') == 'keyboard':
-                            key_name = act.get('key')
-                            selenium_key = key_map.get(key_name, Keys.TAB)
-                            try:
-                                active_element = driver.switch_to.active_element
-                                active_element.send_keys(selenium_key)
-                            except:
-                                body = driver.find_element(By.TAG_NAME, 'body')
-                                body.send_keys(selenium_key)
-                            time.sleep(0.3)
-                        elif act.get('type') == 'click':
-                            selector = act.get('selector')
-                            if selector:
-                                try:
-                                    scroll_y = act.get('scrollY', 0)
-                                    if scroll_y:
-                                        driver.execute_script(f"window.scrollTo(0, {scroll_y});")
-                                        time.sleep(0.2)
-                                    
-                                    el = WebDriverWait(driver, 5).until(
-                                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                                    )
-                                    el.click()
-                                    time.sleep(0.5)
-                                except Exception as e:
-                                    if log_callback:
-                                        log_callback(f"Click failed: {e}")
-                time.sleep(0.5)
+                log_callback(f"Step {step_idx + 1}: {step.desc}")
+            if step.handler is None:
                 continue
-            
-            if action_type == 'keyboard':
-                # Handle keyboard actions
-                from selenium.webdriver.common.keys import Keys
-                
-                key_map = {
-                    'TAB': Keys.TAB,
-                    'ENTER': Keys.ENTER,
-                    'SPACE': Keys.SPACE,
-                    'ARROW_DOWN': Keys.ARROW_DOWN,
-                    'ARROW_UP': Keys.ARROW_UP,
-                    'ARROW_LEFT': Keys.ARROW_LEFT,
-                    'ARROW_RIGHT': Keys.ARROW_RIGHT,
-                    'ESCAPE': Keys.ESCAPE,
-                    'BACKSPACE': Keys.BACKSPACE,
-                    'DELETE': Keys.DELETE,
-                }
-                
-                # Check if new format (keys array) or old format (single key + repeat)
-                if 'keys' in action:
-                    # New format: list of keys recorded from browser
-                    keys_sequence = action.get('keys', [])
-                    active_element = driver.switch_to.active_element
-                    for key_name in keys_sequence:
-                        selenium_key = key_map.get(key_name, Keys.TAB)
-                        active_element.send_keys(selenium_key)
-                        time.sleep(0.3)
-                else:
-                    # Old format: single key with repeat count
-                    key_name = action.get('key', 'TAB')
-                    repeat = action.get('repeat', 1)
-                    selenium_key = key_map.get(key_name, Keys.TAB)
-                    active_element = driver.switch_to.active_element
-                    for _ in range(repeat):
-                        active_element.send_keys(selenium_key)
-                        time.sleep(0.3)
-                
-                time.sleep(0.5)
-                continue
-            
-            by = getattr(By, action.get('by', 'CSS_SELECTOR').upper())
-            selector = action.get('selector')
-            if not selector and action_type != 'navigate':
-                continue
-            
-            if action_type == 'navigate':
-                nav_url = action.get('url')
-                if nav_url:
-                    driver.get(nav_url)
-                    time.sleep(1)
-                continue
-            
-            if action_type == 'click':
-                el = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((by, selector))
-                )
-                time.sleep(0.5)
-                
-                # Click with stale element retry (same as verify workflow)
-                try:
-                    el.click()
-                except Exception as e:
-                    if 'stale' in str(e).lower():
-                        if log_callback:
-                            log_callback("Element became stale, re-finding...")
-                        el = WebDriverWait(driver, 5).until(
-                            EC.element_to_be_clickable((by, selector))
-                        )
-                        el.click()
-                    else:
-                        raise
-                
-                time.sleep(0.5)
-                
-            elif action_type == 'input':
-                el = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((by, selector))
-                )
-                csv_col = config['csv_mapping'].get(selector)
-                value = None
-                
-                if csv_col == '__RECORDED__':
-                    value = str(action.get('value', ''))
-                elif csv_col and csv_col in row:
-                    # Handle blank/NaN values properly
-                    raw_value = row[csv_col]
-                    if pd.isna(raw_value):
-                        value = ''
-                    else:
-                        value = str(raw_value)
-                        # Convert state names to abbreviations
-                        field_id = action.get('field_context', {}).get('id', '').lower()
-                        if 'state' in field_id or 'state' in csv_col.lower():
-                            state_abbr = STATE_MAPPING.get(value.lower().strip())
-                            if state_abbr:
-                                value = state_abbr
-                else:
-                    field_context = action.get('field_context', {})
-                    llm_value = infer_field_value_with_llm(field_context, csv_row_dict)
-                    if llm_value:
-                        value = llm_value
-                    else:
-                        value = str(action.get('value', ''))
-                
-                if value is not None:
-                    el.clear()
-                    if value:  # Only send keys if value is not empty
-                        el.send_keys(value)
-                time.sleep(0.5)
-                    
-            elif action_type == 'select':
-                from selenium.webdriver.support.ui import Select
-                el = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((by, selector))
-                )
-                select_el = Select(el)
-                csv_col = config['csv_mapping'].get(selector)
-                value = None
-                
-                available_options = [opt.text for opt in select_el.options if opt.text.strip()]
-                
-                if csv_col == '__RECORDED__':
-                    value = str(action.get('value', ''))
-                elif csv_col and csv_col in row:
-                    # Handle blank/NaN values properly
-                    raw_value = row[csv_col]
-                    if pd.isna(raw_value):
-                        value = ''
-                    else:
-                        value = str(raw_value)
-                        # Convert state names to abbreviations
-                        field_id = action.get('field_context', {}).get('id', '').lower()
-                        if 'state' in field_id or 'state' in csv_col.lower():
-                            state_abbr = STATE_MAPPING.get(value.lower().strip())
-                            if state_abbr:
-                                value = state_abbr
-                else:
-                    field_context = action.get('field_context', {})
-                    llm_value = infer_field_value_with_llm(field_context, csv_row_dict, available_options=available_options)
-                    if llm_value:
-                        value = llm_value
-                    else:
-                        value = str(action.get('value', ''))
-                
-                if value is not None and value != '':
-                    select_el.select_by_visible_text(value)
-                time.sleep(0.5)
-                
+            if plan.fast_fill and step.kind in FIELD_ACTIONS:
+                group = plan.fast_fill_group(step_idx, fill_stop)
+                if group:
+                    fill_until = plan.fill_fast(ctx, group)
+                    if fill_until > step_idx:
+                        wait_for_page_ready(driver, plan.pacing)
+                        continue
+            step.handler(ctx, step)
         except Exception as e:
             if log_callback:
                 log_callback(f"Error on step {step_idx + 1}: {e}")
+            if step_idx >= plan.submit_index:
+                raise PossiblySubmittedError(f"Possibly submitted - failed on step {step_idx + 1}: {e}") from e
             raise
 
 def replay_workflow(config_file, csv_file, headless=False):
     with open(config_file) as f:
         config = json.load(f)
-    df = pd.read_csv(csv_file)
-    driver = init_driver(headless=headless)
+    source = CSVRowSource(csv_file)
+    total_rows = len(source)
+    driver = DRIVER_POOL.lease(headless=headless)
+    apply_resource_policy(driver, config)
     driver.get(config['url'])
 
     # Optional login
@@ -3365,154 +5504,955 @@ def replay_workflow(config_file, csv_file, headless=False):
         except Exception as e:
             print(f"Login skipped/failed: {e}")
 
-    for idx, row in df.iterrows():
-        print(f"\nProcessing row {idx + 1}/{len(df)}...")
-        csv_row_dict = row.to_dict()
-        
-        # Execute all steps for every row
-        actions_to_execute = config['actions']
-        
-        for action in actions_to_execute:
-            try:
-                action_type = action.get('action')
-                by = getattr(By, action.get('by', 'CSS_SELECTOR').upper())
-                selector = action.get('selector')
-                if not selector:
-                    continue
+    # Stream the CSV in chunks; values for each chunk are prefetched in the background
+    for chunk in source.iter_chunks():
+        prefetcher = RowValuePrefetcher(config, chunk, chunk.index.tolist()).start()
+        for idx, row in chunk.iterrows():
+            print(f"\nProcessing row {idx + 1}/{total_rows}...")
+            csv_row_dict = row.to_dict()
+            inferred_values = prefetcher.get(idx)
+            if inferred_values is None:
+                inferred_values = infer_row_values(config, row)
+        
+            # Execute all steps for every row
+            actions_to_execute = config['actions']
+        
+            for action in actions_to_execute:
+                try:
+                    action_type = action.get('action')
+                    by = getattr(By, action.get('by', 'CSS_SELECTOR').upper())
+                    selector = action.get('selector')
+                    if not selector:
+                        continue
                 
-                if action_type == 'navigate':
-                    # Handle navigation actions
-                    nav_url = action.get('url')
-                    if nav_url:
-                        driver.get(nav_url)
-                        time.sleep(1)
-                    continue
+                    if action_type == 'navigate':
+                        # Handle navigation actions
+                        nav_url = action.get('url')
+                        if nav_url:
+                            driver.get(nav_url)
+                            time.sleep(1)
+                        continue
                     
-                if action_type == 'click':
-                    el = driver.find_element(by, selector)
-                    el.click()
+                    if action_type == 'click':
+                        el = driver.find_element(by, selector)
+                        el.click()
                     
-                elif action_type == 'input':
-                    el = driver.find_element(by, selector)
-                    csv_col = config['csv_mapping'].get(selector)
-                    value = None
+                    elif action_type == 'input':
+                        el = driver.find_element(by, selector)
+                        csv_col = config['csv_mapping'].get(selector)
+                        value = None
                     
-                    if csv_col == '__RECORDED__':
-                        # User explicitly chose to use recorded value
-                        value = str(action.get('value', ''))
-                        print(f"  Input field '{selector[:50]}...': Using recorded value '{value}'")
-                    elif csv_col and csv_col in row:
-                        # Direct CSV mapping
-                        value = str(row[csv_col])
-                        print(f"  Input field '{selector[:50]}...': Using CSV column '{csv_col}' = '{value}'")
-                    else:
-                        # Try LLM inference for unmapped field
-                        field_context = action.get('field_context', {})
-                        llm_value = infer_field_value_with_llm(field_context, csv_row_dict)
-                        if llm_value:
-                            value = llm_value
-                            print(f"  Input field '{selector[:50]}...': LLM suggested '{value}'")
-                        else:
-                            # Fallback to recorded value
+                        if csv_col == '__RECORDED__':
+                            # User explicitly chose to use recorded value
                             value = str(action.get('value', ''))
                             print(f"  Input field '{selector[:50]}...': Using recorded value '{value}'")
+                        elif csv_col and csv_col in row:
+                            # Direct CSV mapping
+                            value = str(row[csv_col])
+                            print(f"  Input field '{selector[:50]}...': Using CSV column '{csv_col}' = '{value}'")
+                        else:
+                            # Try LLM inference for unmapped field (batched per row)
+                            if selector in inferred_values:
+                                llm_value = inferred_values[selector]
+                            else:
+                                field_context = action.get('field_context', {})
+                                llm_value = infer_field_value_with_llm(field_context, csv_row_dict)
+                            if llm_value:
+                                value = llm_value
+                                print(f"  Input field '{selector[:50]}...': LLM suggested '{value}'")
+                            else:
+                                # Fallback to recorded value
+                                value = str(action.get('value', ''))
+                                print(f"  Input field '{selector[:50]}...': Using recorded value '{value}'")
                     
-                    if value is not None:
-                        el.clear()
-                        el.send_keys(value)
+                        if value is not None:
+                            el.clear()
+                            el.send_keys(value)
                         
-                elif action_type == 'select':
-                    from selenium.webdriver.support.ui import Select
-                    el = Select(driver.find_element(by, selector))
-                    csv_col = config['csv_mapping'].get(selector)
-                    value = None
+                    elif action_type == 'select':
+                        el = Select(driver.find_element(by, selector))
+                        csv_col = config['csv_mapping'].get(selector)
+                        value = None
                     
-                    # Get available options
-                    available_options = [opt.text for opt in el.options if opt.text.strip()]
+                        # Get available options
+                        available_options = [opt.text for opt in el.options if opt.text.strip()]
                     
-                    if csv_col == '__RECORDED__':
-                        # User explicitly chose to use recorded value
-                        value = str(action.get('value', ''))
-                        print(f"  Select field '{selector[:50]}...': Using recorded value '{value}'")
-                    elif csv_col and csv_col in row:
-                        # Direct CSV mapping
-                        value = str(row[csv_col])
-                        print(f"  Select field '{selector[:50]}...': Using CSV column '{csv_col}' = '{value}'")
-                    else:
-                        # Try LLM inference for unmapped select
-                        field_context = action.get('field_context', {})
-                        llm_value = infer_field_value_with_llm(field_context, csv_row_dict, available_options=available_options)
-                        if llm_value:
-                            value = llm_value
-                            print(f"  Select field '{selector[:50]}...': LLM suggested '{value}' from options: {available_options}")
-                        else:
-                            # Fallback to recorded value
+                        if csv_col == '__RECORDED__':
+                            # User explicitly chose to use recorded value
                             value = str(action.get('value', ''))
                             print(f"  Select field '{selector[:50]}...': Using recorded value '{value}'")
+                        elif csv_col and csv_col in row:
+                            # Direct CSV mapping
+                            value = str(row[csv_col])
+                            print(f"  Select field '{selector[:50]}...': Using CSV column '{csv_col}' = '{value}'")
+                        else:
+                            # Try LLM inference for unmapped select (batched per row)
+                            llm_value = inferred_values.get(selector)
+                            if llm_value is None or (llm_value and llm_value not in available_options):
+                                field_context = action.get('field_context', {})
+                                llm_value = infer_field_value_with_llm(field_context, csv_row_dict, available_options=available_options)
+                            if llm_value:
+                                value = llm_value
+                                print(f"  Select field '{selector[:50]}...': LLM suggested '{value}' from options: {available_options}")
+                            else:
+                                # Fallback to recorded value
+                                value = str(action.get('value', ''))
+                                print(f"  Select field '{selector[:50]}...': Using recorded value '{value}'")
                     
-                    if value is not None and value != '':
-                        el.select_by_visible_text(value)
+                        if value is not None and value != '':
+                            el.select_by_visible_text(value)
                         
-                time.sleep(0.5)
-            except Exception as e:
-                print(f"Error on action {action}: {e}")
+                    time.sleep(0.5)
+                except Exception as e:
+                    print(f"Error on action {action}: {e}")
+        prefetcher.cancel()
     
     print("\nWorkflow completed for all rows.")
-    driver.quit()
+    for line in llm_usage_summary():
+        print(line)
+    LLM_CACHE.flush()
+    RESEARCH_CACHE.flush()
+    DRIVER_POOL.release(driver)
+
+# -------------------------
+# HTTP Submission Engine
+# -------------------------
+
+HTTP_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0 Safari/537.36'
+HTTP_CONCURRENCY = 8        # Parallel submissions (config['http_concurrency'])
+HTTP_RATE_LIMIT = 5.0       # Requests per second per host (config['http_rate_limit'], 0 = unlimited)
+HTTP_MAX_RETRIES = 4        # Retries on 429/5xx and connection errors
+HTTP_BACKOFF_BASE = 1.0     # Seconds; doubles per retry unless Retry-After is given
+HTTP_RETRY_STATUSES = {429, 500, 502, 503, 504}
+HTTP_POST_RETRY_STATUSES = {429}  # A POST that got a 5xx or timed out may already have been processed
+
+class HostRateLimiter:
+    """Spaces requests to each host at least 1/rate seconds apart (shared by all threads)."""
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        from urllib.parse import urlparse
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def build_http_session(pool_size=HTTP_CONCURRENCY):
+    """requests.Session with a connection pool sized for concurrent submissions."""
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = HTTP_USER_AGENT
+    return session
+
+def _retry_delay(response, attempt):
+    """Seconds to wait before retry `attempt` (honours a numeric Retry-After header)."""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.strip().isdigit():
+            return min(float(retry_after), 60.0)
+    return HTTP_BACKOFF_BASE * (2 ** (attempt - 1))
+
+def _is_connect_error(exc):
+    """True if the request never reached the server (connect refused/timed out, DNS failure)."""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(exc, requests.exceptions.ConnectionError):
+        return False
+    from urllib3.exceptions import NewConnectionError
+    reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+    return isinstance(reason, NewConnectionError)
+
+def submit_form_request(session, method, action, data, limiter=None, max_retries=HTTP_MAX_RETRIES, timeout=30):
+    """
+    Submit one form payload with exponential backoff. GETs are retried on
+    429/5xx responses and connection errors; POSTs are not idempotent, so they
+    are only retried when the request never reached the server or got a 429.
+    Returns (response, attempts); raises RuntimeError when the final response
+    is still an error.
+    """
+    retry_statuses = HTTP_POST_RETRY_STATUSES if method == 'post' else HTTP_RETRY_STATUSES
+    attempt = 0
+    while True:
+        attempt += 1
+        if limiter:
+            limiter.wait(action)
+        response = None
+        try:
+            if method == 'post':
+                response = session.post(action, data=data, timeout=timeout)
+            else:
+                response = session.get(action, params=data, timeout=timeout)
+        except requests.RequestException as e:
+            if attempt > max_retries or (method == 'post' and not _is_connect_error(e)):
+                raise RuntimeError(f'Form submission failed after {attempt} attempts: {e}') from e
+        else:
+            if response.status_code not in retry_statuses or attempt > max_retries:
+                if response.status_code >= 400:
+                    raise RuntimeError(f'Form submission failed with status {response.status_code} at {action}')
+                return response, attempt
+        time.sleep(_retry_delay(response, attempt))
+
+HTTP_TOKEN_REFRESH_ROWS = 25   # Re-read hidden/anti-CSRF tokens every N rows (config['http_token_refresh_rows'], 0 = never)
+HTTP_TOKEN_NAME_HINTS = ('csrf', 'xsrf', 'token', 'nonce', 'authenticity', 'verification', 'viewstate', 'eventvalidation')
+
+class FormModel:
+    """
+    Submission model of the first <form> on a page, built from a single fetch.
+
+    Holds the method/action, detected fields (same field_N keys as
+    detect_fields_via_requests), and default values for everything the browser
+    would send untouched: hidden inputs, pre-filled inputs, checked
+    boxes/radios, selected options and textarea text. Hidden fields that look
+    like anti-CSRF tokens are refreshed with a regex scan of a fresh GET, so the
+    page is never re-parsed with BeautifulSoup per row.
+    """
+    def __init__(self, url, soup, refresh_every=HTTP_TOKEN_REFRESH_ROWS):
+        form = soup.find('form')
+        if not form:
+            raise RuntimeError('No <form> found on the page for HTTP submission mode.')
+        self.url = url
+        self.method = (form.get('method') or 'get').lower()
+        action = form.get('action') or url
+        if not action.startswith('http'):
+            # Resolve relative action
+            from urllib.parse import urljoin
+            action = urljoin(url, action)
+        self.action = action
+        self.fields = parse_form_fields(soup)
+        self.defaults = self._form_defaults(form)
+        self.token_names = [name for name in self.defaults
+                            if any(hint in name.lower() for hint in HTTP_TOKEN_NAME_HINTS)]
+        self.refresh_every = refresh_every if self.token_names else 0
+        self._tokens = {name: self.defaults[name] for name in self.token_names}
+        self._rows_since_refresh = 0
+        self._lock = threading.Lock()
+        self._payload_keys = {}
 
-def replay_workflow_http(config_file, csv_file):
+    @staticmethod
+    def _form_defaults(form):
+        defaults = {}
+        for tag in form.find_all(['input', 'select', 'textarea']):
+            name = tag.get('name')
+            if not name or tag.has_attr('disabled'):
+                continue
+            if tag.name == 'select':
+                options = tag.find_all('option')
+                chosen = next((o for o in options if o.has_attr('selected')), options[0] if options else None)
+                if chosen is not None:
+                    defaults[name] = chosen.get('value', chosen.get_text(strip=True))
+            elif tag.name == 'textarea':
+                defaults[name] = tag.get_text()
+            else:
+                input_type = (tag.get('type') or 'text').lower()
+                if input_type in ('submit', 'button', 'image', 'reset', 'file'):
+                    continue
+                if input_type in ('checkbox', 'radio'):
+                    if tag.has_attr('checked'):
+                        defaults[name] = tag.get('value', 'on')
+                else:
+                    defaults[name] = tag.get('value', '')
+        return defaults
+
+    def payload_key(self, mapping_key):
+        """Resolve a csv_mapping key (field_N, name, id, '#id' or [name=...] selector) to a payload key."""
+        if mapping_key in self._payload_keys:
+            return self._payload_keys[mapping_key]
+        import re
+        key = None
+        info = self.fields.get(mapping_key)
+        if info:
+            key = info.get('name') or info.get('id')
+        else:
+            by_name = {f.get('name'): f for f in self.fields.values() if f.get('name')}
+            by_id = {f.get('id'): f for f in self.fields.values() if f.get('id')}
+            name_match = re.search(r"\[name=['\"]?([^'\"\]]+)", mapping_key)
+            id_match = re.match(r'^#([\w\-:.]+)$', mapping_key)
+            if mapping_key in by_name:
+                key = mapping_key
+            elif name_match and name_match.group(1) in by_name:
+                key = name_match.group(1)
+            else:
+                field = by_id.get(mapping_key) or (by_id.get(id_match.group(1)) if id_match else None)
+                if field:
+                    key = field.get('name') or field.get('id')
+        self._payload_keys[mapping_key] = key
+        return key
+
+    def build_payload(self, csv_mapping, row):
+        """Defaults + current tokens, overlaid with mapped CSV values."""
+        data = dict(self.defaults)
+        with self._lock:
+            data.update(self._tokens)
+        for mapping_key, csv_col in csv_mapping.items():
+            if not csv_col or csv_col == '__RECORDED__':
+                continue
+            payload_key = self.payload_key(mapping_key)
+            if payload_key and csv_col in row:
+                value = row[csv_col]
+                data[payload_key] = '' if pd.isna(value) else str(value)
+        return data
+
+    def refresh_tokens(self, session, force=False):
+        """Re-read token values every refresh_every rows (or now, if force)."""
+        if not self.token_names:
+            return
+        with self._lock:
+            self._rows_since_refresh += 1
+            if not force and (not self.refresh_every or self._rows_since_refresh <= self.refresh_every):
+                return
+            self._rows_since_refresh = 1
+        # Fetch outside the lock so other workers keep building payloads with
+        # the current tokens; only the thread that reset the counter gets here.
+        try:
+            resp = session.get(self.url, timeout=30)
+            resp.raise_for_status()
+            fresh = self.scan_hidden_inputs(resp.text)
+        except Exception as e:
+            print(f"Token refresh failed (keeping previous tokens): {e}")
+            return
+        with self._lock:
+            self._tokens.update({name: fresh[name] for name in self.token_names if name in fresh})
+
+    @staticmethod
+    def scan_hidden_inputs(html):
+        """Cheap regex scan of <input type=hidden> name/value pairs."""
+        import re
+        import html as html_lib
+        values = {}
+        for tag in re.findall(r'<input\b[^>]*>', html, re.IGNORECASE):
+            if not re.search(r'type\s*=\s*["\']?hidden', tag, re.IGNORECASE):
+                continue
+            name = re.search(r'name\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', tag, re.IGNORECASE)
+            value = re.search(r'value\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', tag, re.IGNORECASE)
+            if name:
+                name = next(g for g in name.groups() if g is not None)
+                values[name] = html_lib.unescape(next((g for g in value.groups() if g is not None), '')) if value else ''
+        return values
+
+def replay_workflow_http(config_file, csv_file, site_name=None, concurrency=None, rate_limit=None, log_callback=None):
     """
     Replay a workflow without a browser by submitting the first <form> on the page.
-    Uses the saved csv_mapping where keys are detected field identifiers and values are CSV column names.
-    The payload keys prefer each field's 'name' attribute; falling back to 'id' if missing.
+    Uses the saved csv_mapping where keys are detected field identifiers (or field names/ids)
+    and values are CSV column names; see FormModel for payload defaults and token refresh.
+
+    Rows are submitted concurrently over a pooled session (config['http_concurrency'],
+    config['http_rate_limit'] requests/second per host), 429/5xx responses are retried
+    with backoff, and each row's result is recorded in the site's run store.
+    Rows already completed in the run store are skipped, and no new rows are
+    submitted once the failure circuit breaker trips.
+    Returns {'completed': n, 'failed': n, 'skipped': n} plus 'aborted' (the
+    breaker's reason) if the run was stopped.
     """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
     with open(config_file) as f:
         config = json.load(f)
     url = config['url']
-    df = pd.read_csv(csv_file)
+    source = CSVRowSource(csv_file)
+    if site_name is None:
+        site_name = os.path.basename(config_file).replace('_workflow.json', '')
+    if concurrency is None:
+        concurrency = config.get('http_concurrency', HTTP_CONCURRENCY)
+    if rate_limit is None:
+        rate_limit = config.get('http_rate_limit', HTTP_RATE_LIMIT)
+    concurrency = max(1, int(concurrency))
+    log = log_callback or print
 
-    session = requests.Session()
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0 Safari/537.36'
-    }
-    # Load the page to discover the form
-    resp = session.get(url, headers=headers, timeout=30)
+    session = build_http_session(concurrency)
+    limiter = HostRateLimiter(rate_limit)
+    # Load the page once; the form model carries fields, defaults and tokens
+    resp = session.get(url, timeout=30)
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, 'html.parser')
-    form = soup.find('form')
-    if not form:
-        raise RuntimeError('No <form> found on the page for HTTP submission mode.')
-    method = (form.get('method') or 'get').lower()
-    action = form.get('action') or url
-    if not action.startswith('http'):
-        # Resolve relative action
-        from urllib.parse import urljoin
-        action = urljoin(url, action)
-
-    # Build a lookup of detected fields: prefer name then id
-    detected = detect_fields_via_requests(url)
-    # Map selector keys to payload key (field name or id)
-    selector_to_payload_key = {}
-    for key, info in detected.items():
-        payload_key = info.get('name') or info.get('id')
-        if payload_key:
-            selector_to_payload_key[key] = payload_key
-
-    for _, row in df.iterrows():
-        data = {}
-        for selector_key, csv_col in config['csv_mapping'].items():
-            if not csv_col:
+    model = FormModel(url, BeautifulSoup(resp.text, 'html.parser'),
+                      refresh_every=config.get('http_token_refresh_rows', HTTP_TOKEN_REFRESH_ROWS))
+    if model.token_names:
+        log(f"HTTP mode: refreshing {', '.join(model.token_names)} every {model.refresh_every or 'no'} rows")
+
+    def submit_row(row_idx, row):
+        started = time.time()
+        entry = {'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'), 'row_number': row_idx + 1, 'row_hash': row_hash(row)}
+        try:
+            model.refresh_tokens(session)
+            payload = model.build_payload(config['csv_mapping'], row)
+            response, attempts = submit_form_request(session, model.method, model.action, payload, limiter=limiter)
+            entry.update({'status': 'completed', 'http_status': response.status_code})
+        except Exception as e:
+            entry.update({'status': 'failed', 'error': str(e)})
+        entry['duration'] = time.time() - started
+        record_row_status(site_name, row_idx, entry)
+        return row_idx, entry
+
+    counts = {'completed': 0, 'failed': 0, 'skipped': 0}
+    total_rows = len(source)
+    store = get_run_store(site_name)
+    breaker = FailureCircuitBreaker()
+
+    def collect(done):
+        for future in done:
+            row_idx, entry = future.result()
+            counts[entry['status']] += 1
+            breaker.record(entry['status'] == 'completed')
+            if entry['status'] == 'failed':
+                log(f"✗ Row {row_idx + 1} failed: {entry['error']}")
+            finished = counts['completed'] + counts['failed']
+            if finished % 100 == 0 or finished + counts['skipped'] == total_rows:
+                log(f"HTTP mode: {finished}/{total_rows - counts['skipped']} rows submitted ({counts['failed']} failed)")
+
+    # Keep a bounded window of in-flight rows so memory stays flat on large files
+    max_in_flight = concurrency * 4
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = set()
+        for chunk in source.iter_chunks():
+            if breaker.tripped:
+                break
+            # Rows completed by an earlier run are never submitted again
+            completed = store.completed_between(int(chunk.index.min()), int(chunk.index.max()) + 1) if len(chunk) else set()
+            for row_idx, row in chunk.iterrows():
+                if row_idx in completed:
+                    counts['skipped'] += 1
+                    continue
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                if breaker.tripped:
+                    break
+                pending.add(pool.submit(submit_row, row_idx, row))
+        done, _ = wait(pending)
+        collect(done)
+
+    if counts['skipped']:
+        log(f"HTTP mode: skipped {counts['skipped']} rows completed by earlier runs")
+    if breaker.tripped:
+        counts['aborted'] = breaker.reason
+        log(f"❌ HTTP mode stopped - circuit breaker tripped: {breaker.reason}")
+    compact_processing_status(site_name)
+    return counts
+
+# -------------------------
+# Browser-to-HTTP Compiler
+# -------------------------
+
+# During verification the browser runs with Chrome's performance log enabled.
+# The last successful form/XHR/fetch POST seen is compiled into
+# config['http_template']: the request with every posted value of a mapped
+# field replaced by a {{column}} placeholder. Partial runs then
+# submit rows straight over HTTP and fall back to the browser on the first
+# row the template can't handle.
+HTTP_TEMPLATE_HEADERS = ('content-type', 'accept', 'origin', 'referer', 'x-requested-with')
+HTTP_TEMPLATE_REQUEST_TYPES = ('Document', 'XHR', 'Fetch')
+HTTP_TEMPLATE_BODY_CHARS = 200000  # Response text kept per captured POST (for the success marker)
+# Response lines containing one of these are preferred as the success marker
+HTTP_SUCCESS_HINTS = ('thank', 'success', 'received', 'submitted', 'confirm', 'we will', "we'll")
+
+def drain_network_log(driver, captured, domain_types=None):
+    """
+    Move POST requests (and their response status) from the performance log into
+    `captured`. If domain_types is given, also record {domain: set(request types)}
+    for every request (resource-policy learn mode).
+    """
+    try:
+        entries = driver.get_log('performance')
+    except Exception:
+        return  # Logging not enabled for this driver
+    for entry in entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        method = message.get('method')
+        params = message.get('params', {})
+        request_id = params.get('requestId')
+        if method == 'Network.requestWillBeSent' and domain_types is not None:
+            from urllib.parse import urlparse
+            host = urlparse(params.get('request', {}).get('url', '')).hostname
+            if host:
+                domain_types.setdefault(host, set()).add(params.get('type', 'Other'))
+        if method == 'Network.requestWillBeSent':
+            # A redirect reuses the requestId; its redirectResponse is the POST's status
+            if request_id in captured and 'redirectResponse' in params:
+                captured[request_id].setdefault('status', params['redirectResponse'].get('status'))
+                captured[request_id]['final_url'] = params.get('request', {}).get('url')
                 continue
-            payload_key = selector_to_payload_key.get(selector_key)
-            if payload_key and csv_col in row:
-                data[payload_key] = str(row[csv_col])
-        if method == 'post':
-            r = session.post(action, data=data, headers=headers, timeout=30)
+            request = params.get('request', {})
+            if request.get('method', 'GET').upper() != 'POST' or params.get('type') not in HTTP_TEMPLATE_REQUEST_TYPES:
+                continue
+            post_data = request.get('postData')
+            if post_data is None and request.get('hasPostData'):
+                try:
+                    post_data = driver.execute_cdp_cmd('Network.getRequestPostData', {'requestId': request_id}).get('postData')
+                except Exception:
+                    post_data = None
+            captured[request_id] = {
+                'url': request.get('url'),
+                'headers': request.get('headers', {}),
+                'post_data': post_data,
+                'order': len(captured),
+            }
+        elif method == 'Network.responseReceived' and request_id in captured:
+            captured[request_id].setdefault('status', params.get('response', {}).get('status'))
+        elif method == 'Network.loadingFinished' and request_id in captured and 'body' not in captured[request_id]:
+            try:
+                result = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                body = '' if result.get('base64Encoded') else result.get('body', '')
+            except Exception:
+                body = ''
+            captured[request_id]['body'] = body[:HTTP_TEMPLATE_BODY_CHARS]
+
+# Posted values shorter than this are only templatized when the field name
+# also matches the mapped step (otherwise "CA"/"Yes" would capture constants).
+HTTP_TEMPLATE_MIN_VALUE_MATCH = 4
+
+def _mapped_field_steps(config):
+    """(step index, action, csv column) of input/select steps mapped to a CSV column."""
+    csv_mapping = config.get('csv_mapping') or {}
+    for idx, action in enumerate(config.get('actions', [])):
+        if action.get('action') not in ('input', 'select'):
+            continue
+        col = csv_mapping.get(action.get('selector'))
+        if col and col != '__RECORDED__':
+            yield idx, action, col
+
+def _template_value(action, col, row):
+    """The value the browser would post for this step and row (replay normalization + option value)."""
+    value = csv_cell_value(action, col, row[col]) if col in row else ''
+    if action.get('action') == 'select':
+        value = ((action.get('field_context') or {}).get('option_values') or {}).get(value, value)
+    return value
+
+def _response_text(body):
+    """Visible text of an HTML/text response, whitespace-collapsed, one entry per line."""
+    import re
+    import html as html_lib
+    text = re.sub(r'(?is)<(script|style)\b.*?</\1>', ' ', body)
+    text = html_lib.unescape(re.sub(r'<[^>]+>', '\n', text))
+    return [' '.join(line.split()) for line in text.splitlines() if line.strip()]
+
+def response_success_marker(body, row_values=()):
+    """
+    Something from the verified submission's response that every successful
+    submission should repeat: the top-level keys of a JSON object, else a
+    short line that reads like a confirmation (or the page title). Lines
+    containing the test row's own values are skipped. None if nothing fits.
+    """
+    import re
+    if not body:
+        return None
+    try:
+        data = json.loads(body)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        return {'json_keys': sorted(data)} if data else None
+    row_values = [v.lower() for v in row_values if len(v) >= 3]
+    usable = lambda line: 3 < len(line) <= 120 and not any(v in line.lower() for v in row_values)
+    lines = [line for line in _response_text(body) if usable(line)]
+    hinted = next((line for line in lines if any(h in line.lower() for h in HTTP_SUCCESS_HINTS)), None)
+    if hinted:
+        return {'text': hinted}
+    title = re.search(r'(?is)<title[^>]*>(.*?)</title>', body)
+    title = _response_text(title.group(1))[0] if title and _response_text(title.group(1)) else ''
+    return {'text': title} if title and usable(title) else None
+
+def compile_http_template(captured, test_row, config):
+    """
+    Compile the final captured submission into an HTTP template, or None if it
+    can't be. Posted fields are bound to mapped workflow steps (by field name,
+    or by an unambiguous value) after applying the same normalization as replay.
+    Workflows with a login/setup prefix are never compiled: the template is
+    replayed from a fresh session without the browser's cookies.
+    """
+    from urllib.parse import parse_qsl
+    if config.get('loop_start_step', 0) > 0:
+        return None
+    candidates = [r for r in captured.values()
+                  if r.get('post_data') and r.get('status') and r['status'] < 400]
+    if not candidates:
+        return None
+    request = max(candidates, key=lambda r: r['order'])
+    
+    # What each mapped step posted for the test row
+    by_name = {}
+    by_value = {}
+    for idx, action, col in _mapped_field_steps(config):
+        posted = _template_value(action, col, test_row)
+        if not posted:
+            continue
+        binding = {'column': col, 'step': idx, 'value': posted}
+        context = action.get('field_context') or {}
+        for name in (context.get('name'), context.get('id'), action.get('selector')):
+            if name:
+                by_name.setdefault(name, binding)
+        by_value.setdefault(posted, []).append(binding)
+    bindings = {}
+
+    def templatize(name, value):
+        if not isinstance(value, str):
+            return value
+        binding = by_name.get(name)
+        if binding is None or binding['value'] != value.strip():
+            matches = by_value.get(value.strip(), [])
+            if len(matches) != 1 or len(value.strip()) < HTTP_TEMPLATE_MIN_VALUE_MATCH:
+                return value
+            binding = matches[0]
+        bindings.setdefault(binding['column'], {'column': binding['column'], 'step': binding['step']})
+        return '{{' + binding['column'] + '}}'
+
+    headers = {k: v for k, v in request['headers'].items() if k.lower() in HTTP_TEMPLATE_HEADERS}
+    content_type = next((v for k, v in headers.items() if k.lower() == 'content-type'), '')
+    template = {'method': 'post', 'url': request['url'], 'headers': headers,
+                'expected_status': request['status'], 'expected_url': request.get('final_url'),
+                'compiled_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+    if 'json' in content_type:
+        def walk(node, name=None):
+            if isinstance(node, dict):
+                return {k: walk(v, k) for k, v in node.items()}
+            if isinstance(node, list):
+                return [walk(v, name) for v in node]
+            return templatize(name, node)
+        try:
+            template['json'] = walk(json.loads(request['post_data']))
+        except ValueError:
+            return None
+        names = list(template['json']) if isinstance(template['json'], dict) else []
+    elif 'multipart' in content_type:
+        return None  # File uploads/multipart bodies stay on the browser path
+    else:
+        fields = parse_qsl(request['post_data'], keep_blank_values=True)
+        template['fields'] = [[name, templatize(name, value)] for name, value in fields]
+        names = [name for name, _ in fields]
+    if not bindings:
+        return None  # Nothing row-specific: not the row submission
+    template['placeholders'] = sorted(bindings)
+    template['bindings'] = bindings
+    template['token_fields'] = [n for n in names if any(h in n.lower() for h in HTTP_TOKEN_NAME_HINTS)]
+    row_values = [str(v).strip() for v in test_row.values() if not pd.isna(v)]
+    template['success_marker'] = response_success_marker(request.get('body'), row_values)
+    return template
+
+def validate_http_template(config, columns):
+    """Return (ok, reason) for using config['http_template'] on a CSV with these columns."""
+    template = config.get('http_template')
+    if not template:
+        return False, 'no compiled template'
+    if template.get('enabled') is False:
+        return False, 'disabled in config'
+    if 'bindings' not in template:
+        return False, 'template predates value normalization - re-run verification'
+    if config.get('loop_start_step', 0) > 0:
+        return False, 'workflow has a login/setup prefix (needs the browser session)'
+    if 'success_marker' not in template:
+        return False, 'template has no success check - re-run verification'
+    missing = [c for c in template.get('placeholders', []) if c not in columns]
+    if missing:
+        return False, f"CSV is missing columns {missing}"
+    # Every mapped column must vary per row, or rows would post the test row's value
+    frozen = sorted({col for _, _, col in _mapped_field_steps(config)} - set(template['placeholders']))
+    if frozen:
+        return False, f"mapped columns {frozen} are not templated"
+    if collect_unmapped_field_actions(config, columns=columns):
+        return False, 'workflow has LLM-inferred fields'
+    return True, ''
+
+def _fill_placeholders(value, row, config, bindings):
+    import re
+    if not isinstance(value, str) or '{{' not in value:
+        return value
+    actions = config.get('actions', [])
+
+    def fill(match):
+        binding = bindings.get(match.group(1))
+        if binding is None or binding['step'] >= len(actions):
+            return ''
+        return _template_value(actions[binding['step']], binding['column'], row)
+    return re.sub(r'\{\{(.+?)\}\}', fill, value)
+
+class HttpTemplateSubmitter:
+    """Submits rows through a compiled http_template; disable() switches the run to the browser."""
+    def __init__(self, config, columns):
+        self.config = config
+        self.template = config.get('http_template') or {}
+        self.enabled, self.reason = validate_http_template(config, columns)
+        self.session = None
+        self.limiter = HostRateLimiter(config.get('http_rate_limit', HTTP_RATE_LIMIT))
+        self.refresh_every = config.get('http_token_refresh_rows', HTTP_TOKEN_REFRESH_ROWS)
+        self._tokens = None  # Loaded before the first submission
+        self._rows_since_refresh = 0
+
+    def disable(self, reason):
+        self.enabled = False
+        self.reason = reason
+
+    def _refresh_tokens(self):
+        if not self.template.get('token_fields') or not self.config.get('url'):
+            return
+        if self._tokens is not None and (not self.refresh_every or self._rows_since_refresh < self.refresh_every):
+            return
+        resp = self.session.get(self.config['url'], timeout=30)
+        resp.raise_for_status()
+        fresh = FormModel.scan_hidden_inputs(resp.text)
+        self._tokens = {n: fresh[n] for n in self.template['token_fields'] if n in fresh}
+        self._rows_since_refresh = 0
+
+    def submit(self, row):
+        """
+        Submit one row; raises on any failure. PossiblySubmittedError means the
+        POST may have reached the server (the row must not be replayed); any
+        other error was raised before anything was sent.
+        """
+        if self.session is None:
+            self.session = build_http_session(1)
+            self.session.headers.update(self.template.get('headers', {}))
+        self._refresh_tokens()
+        self._rows_since_refresh += 1
+        tokens = self._tokens or {}
+        bindings = self.template.get('bindings', {})
+        if 'json' in self.template:
+            def walk(node):
+                if isinstance(node, dict):
+                    return {k: tokens.get(k, walk(v)) for k, v in node.items()}
+                if isinstance(node, list):
+                    return [walk(v) for v in node]
+                return _fill_placeholders(node, row, self.config, bindings)
+            data = json.dumps(walk(self.template['json']))
         else:
-            r = session.get(action, params=data, headers=headers, timeout=30)
-        # Basic status check
-        if r.status_code >= 400:
-            raise RuntimeError(f'Form submission failed with status {r.status_code} at {action}')
+            data = [(name, tokens.get(name, _fill_placeholders(value, row, self.config, bindings)))
+                    for name, value in self.template['fields']]
+        try:
+            response, _ = submit_form_request(self.session, 'post', self.template['url'], data, limiter=self.limiter)
+        except RuntimeError as e:
+            if isinstance(e.__cause__, requests.RequestException) and _is_connect_error(e.__cause__):
+                raise  # Never reached the server
+            raise PossiblySubmittedError(f"Possibly submitted - {e}") from e
+        try:
+            self._check_response(response)
+        except RuntimeError as e:
+            raise PossiblySubmittedError(f"Possibly submitted - {e}") from e
+        return response
+
+    def _check_response(self, response):
+        """Raise unless the response looks like the verified submission (status, redirect target, success marker)."""
+        from urllib.parse import urlparse
+        status = response.history[0].status_code if response.history else response.status_code
+        expected_status = self.template.get('expected_status')
+        if expected_status and status != expected_status:
+            raise RuntimeError(f"unexpected response status {status} (verified submission returned {expected_status})")
+        expected_url = self.template.get('expected_url')
+        if expected_url and response.history:
+            expected, actual = urlparse(expected_url), urlparse(response.url)
+            if (expected.netloc, expected.path.rstrip('/')) != (actual.netloc, actual.path.rstrip('/')):
+                raise RuntimeError(f"redirected to {response.url} instead of {expected_url}")
+        marker = self.template.get('success_marker')
+        if not marker:
+            return
+        if 'json_keys' in marker:
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+            if not isinstance(data, dict) or not set(marker['json_keys']) <= set(data):
+                raise RuntimeError(f"response lacks the verified JSON keys {marker['json_keys']}")
+        elif marker['text'].lower() not in ' '.join(_response_text(response.text)).lower():
+            raise RuntimeError(f"response lacks the verified confirmation text '{marker['text']}'")
+
+# -------------------------
+# Parallel Execution
+# -------------------------
+
+MAX_PARALLEL_WORKERS = 8
+
+def shard_row_indices(row_indices, workers):
+    """Split row indices round-robin into one shard per worker (empty shards dropped)."""
+    workers = max(1, min(int(workers), MAX_PARALLEL_WORKERS))
+    shards = [row_indices[w::workers] for w in range(workers)]
+    return [s for s in shards if s]
+
+# Resilient mode: rows get a retry budget, crashed browsers are replaced (the
+# new one restores the session snapshot and re-enters at loop_start_step), and
+# a circuit breaker stops the run only when failures look systemic.
+RESILIENT_ROW_RETRIES = 2
+CIRCUIT_BREAKER_WINDOW = 10          # Recent rows considered
+CIRCUIT_BREAKER_MAX_FAILURE_RATE = 0.5
+CIRCUIT_BREAKER_MAX_CONSECUTIVE = 5
+
+class FailureCircuitBreaker:
+    """Trips when too many recent rows failed (rate over a window, or a consecutive streak)."""
+    def __init__(self, window=CIRCUIT_BREAKER_WINDOW, max_failure_rate=CIRCUIT_BREAKER_MAX_FAILURE_RATE,
+                 max_consecutive=CIRCUIT_BREAKER_MAX_CONSECUTIVE):
+        self.outcomes = deque(maxlen=window)
+        self.max_failure_rate = max_failure_rate
+        self.max_consecutive = max_consecutive
+        self.consecutive_failures = 0
+        self.reason = ''
+        self._lock = threading.Lock()
+
+    def record(self, success):
+        """Record a row outcome; returns True if the breaker is (now) tripped."""
+        with self._lock:
+            self.outcomes.append(bool(success))
+            self.consecutive_failures = 0 if success else self.consecutive_failures + 1
+            failures = self.outcomes.count(False)
+            if self.consecutive_failures >= self.max_consecutive:
+                self.reason = f"{self.consecutive_failures} consecutive rows failed"
+            elif len(self.outcomes) == self.outcomes.maxlen and failures / len(self.outcomes) >= self.max_failure_rate:
+                self.reason = f"{failures} of the last {len(self.outcomes)} rows failed"
+            return bool(self.reason)
+
+    @property
+    def tripped(self):
+        return bool(self.reason)
+
+class BrowserRowRunner:
+    """
+    Runs rows in one leased browser and owns its lifecycle: lease + resource
+    policy + initial navigation on first use, session_iteration bookkeeping,
+    and (with retries > 0) recovery. A failed attempt returns the browser to
+    the pool (a crashed one is quit there) and the retry starts in a fresh
+    browser, which restores the session snapshot instead of logging in again.
+    Rows that fail on or after the last submit step are never retried
+    (PossiblySubmittedError).
+    """
+    def __init__(self, config, headless=False, parent=None, retries=0, log_callback=None):
+        self.config = config
+        self.headless = headless
+        self.parent = parent
+        self.retries = retries
+        self.log = log_callback or print
+        self.driver = None
+        self.session_rows = 0
+        self.replacements = 0
+
+    def open(self):
+        self.driver = DRIVER_POOL.lease(headless=self.headless, parent=self.parent)
+        self.session_rows = 0
+        blocked = apply_resource_policy(self.driver, self.config)
+        if blocked:
+            self.log(f"Resource policy: blocking {blocked} URL patterns")
+        # Navigate to initial URL
+        initial_url = self.config.get('url')
+        if initial_url:
+            self.log(f"Navigating to: {initial_url}")
+            self.driver.get(initial_url)
+            wait_for_page_ready(self.driver, get_pacing_profile(self.config))
+
+    def healthy(self):
+        """Cheap liveness probe of the WebDriver session."""
+        try:
+            return self.driver is not None and self.driver.execute_script('return 1') == 1
+        except Exception:
+            return False
+
+    def run_row(self, row, row_idx, log_callback=None, inferred_values=None, row_values=None):
+        """Replay one row; returns the number of attempts, raises after the retry budget."""
+        attempts = 0
+        while True:
+            attempts += 1
+            if self.driver is None:
+                self.open()
+            self.session_rows += 1
+            try:
+                replay_workflow_single_row(self.driver, self.config, row, log_callback=log_callback, row_idx=row_idx,
+                                           session_iteration=self.session_rows, inferred_values=inferred_values,
+                                           row_values=row_values)
+                return attempts
+            except Exception as e:
+                if attempts > self.retries or isinstance(e, PossiblySubmittedError):
+                    raise
+                crashed = not self.healthy()
+                error_msg = str(e).split('\n')[0] or type(e).__name__
+                self.log(f"Row {row_idx + 1} attempt {attempts} failed ({error_msg}) - "
+                         f"{'browser crashed, replacing it' if crashed else 'retrying in a fresh session'}")
+                self.close()
+                self.replacements += 1
+
+    def close(self):
+        if self.driver is not None:
+            DRIVER_POOL.release(self.driver)
+            self.driver = None
+
+PREFETCH_DEPTH = 3
+
+class RowValuePrefetcher:
+    """
+    Resolve LLM/web-research values (infer_row_values) for upcoming rows in a
+    background thread while the browser works on the current row.
+
+    At most `depth` resolved rows are buffered ahead of the browser. Rows must be
+    requested with get() in the same order as row_indices. cancel() stops the
+    background thread (e.g. when the run stops on a failure).
+    """
+    def __init__(self, config, df, row_indices, depth=PREFETCH_DEPTH):
+        self.config = config
+        self.df = df
+        self.row_indices = list(row_indices)
+        self._queue = queue.Queue(maxsize=max(1, depth))
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start prefetching if any field actually needs inference."""
+        llm_config = LLM_SERVICE.config()
+        if not llm_config.get('enabled') or not llm_config.get('api_key'):
+            return self
+        if not collect_unmapped_field_actions(self.config, columns=self.df.columns):
+            return self
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        for row_idx in self.row_indices:
+            if self._stop.is_set():
+                return
+            try:
+                values = infer_row_values(self.config, self.df.loc[row_idx])
+            except Exception as e:
+                print(f"Prefetch error for row {row_idx + 1}: {e}")
+                values = None  # Resolved inline by the replay instead
+            # Bounded queue: block while the browser is `depth` rows behind
+            while not self._stop.is_set():
+                try:
+                    self._queue.put((row_idx, values), timeout=0.2)
+                    break
+                except queue.Full:
+                    continue
+
+    def get(self, row_idx):
+        """
+        Return prefetched values for row_idx, waiting for the background thread
+        if needed. Returns None when not prefetched (caller resolves inline).
+        """
+        if self._thread is None:
+            return None
+        while not self._stop.is_set():
+            try:
+                got_idx, values = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                if not self._thread.is_alive() and self._queue.empty():
+                    return None
+                continue
+            if got_idx == row_idx:
+                return values
+            # Stale entry for a row the caller skipped - drop it
+        return None
+
+    def cancel(self):
+        """Stop prefetching and discard buffered rows."""
+        self._stop.set()
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
 
 #############################
 # Tkinter GUI Implementation #
@@ -3526,6 +6466,7 @@ class LeadAutomationApp:
         self.fields = {}
         self.csv_mapping = {}
         self.actions_log = []
+        self._recording = None  # Active RecordingSession, if any
 
         # Inputs frame
         frm_inputs = ttk.Frame(root, padding=10)
@@ -3653,6 +6594,9 @@ class LeadAutomationApp:
         if not site_url:
             messagebox.showwarning("Missing URL", "Please enter the Site URL.")
             return
+        if self._recording:
+            messagebox.showinfo("Recording In Progress", "Close the recording browser window to finish the current recording first.")
+            return
         self.log("Opening browser to detect fields and start recording...")
         self.actions_log = []
         try:
@@ -3670,78 +6614,23 @@ class LeadAutomationApp:
                 self.log("No fields detected. Page may not have input/select/textarea elements, or they may be dynamically added after user interaction.")
             save_prefs(self.collect_prefs())
 
-            # Start immediate recording session
+            # Record in the background: the page pushes events to a local channel
+            # and a consumer thread collects them, so the GUI stays responsive.
+            # Actions are deduplicated as they arrive (final value per field).
+            self._recorded = ActionDeduplicator()
+            self.actions_log = self._recorded.actions
+            self._recording = RecordingSession(
+                driver,
+                on_action=lambda act: self.root.after(0, lambda a=act: self._on_recorded_action(a)),
+                on_finish=lambda: self.root.after(0, self._finish_recording),
+            ).start()
+            
             messagebox.showinfo(
                 "Recording Started",
                 "Browser launched. Perform your actions now (clicks, inputs, selects).\n"
                 "Navigate across pages as needed - recording continues.\n"
                 "Close the browser window when finished to stop recording."
             )
-            
-            # Track URL changes and re-inject recorder on new pages
-            last_url = driver.current_url
-            while True:
-                try:
-                    current_url = driver.current_url
-                    
-                    # Detect page navigation
-                    if current_url != last_url:
-                        self.log(f"Page navigated: {current_url}")
-                        # Log navigation as a special action
-                        self.actions_log.append({
-                            'action': 'navigate',
-                            'url': current_url,
-                            'from_url': last_url
-                        })
-                        # Re-inject recorder on new page
-                        time.sleep(0.5)  # Brief wait for page to stabilize
-                        inject_recorder(driver)
-                        last_url = current_url
-                    
-                    # Drain any recorded events from the page and append to actions_log
-                    try:
-                        events = driver.execute_script('return window._lgDrain ? window._lgDrain() : [];')
-                    except Exception:
-                        events = []
-                    if events:
-                        for ev in events:
-                            act = build_action_from_event(ev)
-                            if act:
-                                self.actions_log.append(act)
-                    time.sleep(0.75)
-                except Exception:
-                    break
-            self.log("Browser closed. Recording finished.")
-            
-            # Deduplicate actions to keep only final values
-            if self.actions_log:
-                original_count = len(self.actions_log)
-                self.actions_log = deduplicate_actions(self.actions_log)
-                deduped_count = len(self.actions_log)
-                if deduped_count < original_count:
-                    self.log(f"Deduplicated {original_count} actions down to {deduped_count} (kept final values only).")
-                
-                # Display with step numbers for readability
-                self.log("\n=== Recorded Workflow Steps ===")
-                for i, act in enumerate(self.actions_log, 1):
-                    action_type = act.get('action', 'unknown')
-                    if action_type == 'navigate':
-                        self.log(f"Step {i}: Navigate to {act.get('url', 'unknown')}")
-                    elif action_type == 'click':
-                        self.log(f"Step {i}: Click element (by {act.get('by', 'unknown')})")
-                    elif action_type == 'input':
-                        val_preview = act.get('value', '')[:30] + ('...' if len(act.get('value', '')) > 30 else '')
-                        self.log(f"Step {i}: Input '{val_preview}' (by {act.get('by', 'unknown')})")
-                    elif action_type == 'select':
-                        self.log(f"Step {i}: Select '{act.get('value', '')}' (by {act.get('by', 'unknown')})")
-                
-                self.log("\n=== Full Action Details ===\n" + json.dumps(self.actions_log, indent=2))
-            else:
-                self.log("No actions recorded. (Recording hooks can be added to capture clicks/inputs automatically.)")
-            
-            # Save workflow to persist it
-            save_prefs(self.collect_prefs())
-            self.log("\nWorkflow saved! You can now Map CSV, Save Config, and Run Workflow without re-recording.")
 
         except Exception as e:
             # Fallback to HTTP detection if browser cannot be started
@@ -3754,6 +6643,46 @@ class LeadAutomationApp:
             finally:
                 save_prefs(self.collect_prefs())
 
+    def _on_recorded_action(self, act):
+        """Append an action pushed by the recording session (runs on the Tk thread)."""
+        if act.get('action') == 'navigate':
+            self.log(f"Page navigated: {act.get('url')}")
+        self._recorded.add(act)
+
+    def _finish_recording(self):
+        """Post-process the recording once the browser has been closed."""
+        self._recording = None
+        self.log("Browser closed. Recording finished.")
+        
+        # Actions were deduplicated while recording - keep only final values
+        if self.actions_log:
+            original_count = self._recorded.seen
+            deduped_count = len(self.actions_log)
+            if deduped_count < original_count:
+                self.log(f"Deduplicated {original_count} actions down to {deduped_count} (kept final values only).")
+            
+            # Display with step numbers for readability
+            self.log("\n=== Recorded Workflow Steps ===")
+            for i, act in enumerate(self.actions_log, 1):
+                action_type = act.get('action', 'unknown')
+                if action_type == 'navigate':
+                    self.log(f"Step {i}: Navigate to {act.get('url', 'unknown')}")
+                elif action_type == 'click':
+                    self.log(f"Step {i}: Click element (by {act.get('by', 'unknown')})")
+                elif action_type == 'input':
+                    val_preview = act.get('value', '')[:30] + ('...' if len(act.get('value', '')) > 30 else '')
+                    self.log(f"Step {i}: Input '{val_preview}' (by {act.get('by', 'unknown')})")
+                elif action_type == 'select':
+                    self.log(f"Step {i}: Select '{act.get('value', '')}' (by {act.get('by', 'unknown')})")
+            
+            self.log("\n=== Full Action Details ===\n" + json.dumps(self.actions_log, indent=2))
+        else:
+            self.log("No actions recorded. (Recording hooks can be added to capture clicks/inputs automatically.)")
+        
+        # Save workflow to persist it
+        save_prefs(self.collect_prefs())
+        self.log("\nWorkflow saved! You can now Map CSV, Save Config, and Run Workflow without re-recording.")
+
     def on_record_workflow(self):
         site_url = self.ent_site_url.get().strip()
         if not site_url:
@@ -4227,11 +7156,17 @@ class LeadAutomationApp:
         if not os.path.exists(config_file):
             self.log("Please save workflow config first.")
             return
+        save_prefs(self.collect_prefs())
+        self.log(f"Running workflow (HTTP mode) for CSV {csv_file}...")
+        threading.Thread(target=self._run_workflow_http_thread, args=(config_file, csv_file, site_name), daemon=True).start()
+
+    def _run_workflow_http_thread(self, config_file, csv_file, site_name):
+        """Thread to run HTTP-mode submission without blocking the UI."""
         try:
-            self.log(f"Running workflow (HTTP mode) for CSV {csv_file}...")
-            replay_workflow_http(config_file, csv_file)
-            self.log("Workflow completed successfully (HTTP mode).")
-            save_prefs(self.collect_prefs())
+            counts = replay_workflow_http(config_file, csv_file, site_name=site_name, log_callback=self.log)
+            outcome = f"aborted ({counts['aborted']})" if counts.get('aborted') else "completed"
+            self.log(f"Workflow {outcome} (HTTP mode): {counts['completed']} submitted, {counts['failed']} failed, "
+                     f"{counts['skipped']} already completed.")
         except Exception as e:
             self.log(f"Error running workflow: {e}")
 
@@ -4248,22 +7183,20 @@ class LeadAutomationApp:
             messagebox.showerror("File Not Found", f"CSV file not found: {csv_file}")
             return
         
-        # Load CSV to count rows
+        # Count CSV rows (persisted row index, no DataFrame)
         try:
-            df = pd.read_csv(csv_file)
-            total_rows = len(df)
+            total_rows = len(CSVRowSource(csv_file))
         except Exception as e:
             messagebox.showerror("CSV Error", f"Failed to read CSV: {e}")
             return
         
         # Load processing status
-        status = load_processing_status(site_name)
-        completed_count = len([k for k, v in status.items() if v.get('status') == 'completed'])
+        completed_count = get_run_store(site_name).completed_count(total_rows)
         
         # Show dialog to select number of rows
         partial_win = tk.Toplevel(self.root)
         partial_win.title("Run Partial Workflow")
-        partial_win.geometry("450x250")
+        partial_win.geometry("450x340")
         
         # Status info
         info_frame = ttk.Frame(partial_win, padding=10)
@@ -4286,10 +7219,25 @@ class LeadAutomationApp:
         headless_check = ttk.Checkbutton(
             partial_win, 
             text="⚡ Run browser invisibly (faster, with detailed logs)",
-            variable=headless_var
+            variable=headless_var,
+            # Start a headless browser while the user finishes the dialog
+            command=lambda: DRIVER_POOL.prewarm(1, headless=True, parent=self.root) if headless_var.get() else None
         )
         headless_check.pack(pady=10)
         
+        resilient_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            partial_win,
+            text="Resilient mode (retry failed rows, replace crashed browsers)",
+            variable=resilient_var
+        ).pack(pady=(0, 10))
+
+        # Parallel browsers (worker pool)
+        ttk.Label(select_frame, text="Parallel browsers:").grid(row=2, column=0, sticky='w', pady=5)
+        workers_var = tk.StringVar(value='1')
+        workers_spinbox = ttk.Spinbox(select_frame, from_=1, to=MAX_PARALLEL_WORKERS, textvariable=workers_var, width=10)
+        workers_spinbox.grid(row=2, column=1, pady=5, padx=5)
+
         # Quick select buttons
         quick_frame = ttk.Frame(select_frame)
         quick_frame.grid(row=1, column=0, columnspan=2, pady=5)
@@ -4305,8 +7253,10 @@ class LeadAutomationApp:
             try:
                 count = int(row_count_var.get())
                 headless = headless_var.get()
+                workers = int(workers_var.get())
                 partial_win.destroy()
-                self.run_partial_workflow(count, headless=headless)
+                resilient = resilient_var.get()
+                self.run_partial_workflow(count, headless=headless, workers=workers, resilient=resilient)
             except ValueError:
                 messagebox.showerror("Invalid Input", "Please enter a valid number.")
         
@@ -4318,9 +7268,11 @@ class LeadAutomationApp:
         partial_win.transient(self.root)
         partial_win.grab_set()
     
-    def run_partial_workflow(self, row_count, headless=False):
+    def run_partial_workflow(self, row_count, headless=False, workers=1, resilient=False):
         """Run workflow for specified number of unprocessed rows."""
-        if headless:
+        if workers > 1:
+            self.log(f"Running with {workers} parallel headless browsers...")
+        elif headless:
             self.log("Running in headless mode (browser invisible)...")
         site_name = self.ent_site_name.get().strip()
         csv_file = self.ent_csv.get().strip()
@@ -4372,36 +7324,48 @@ class LeadAutomationApp:
             messagebox.showerror("Config Error", f"Failed to load config: {e}")
             return
         
-        # Load CSV
+        # Index the CSV (rows are read lazily below)
         try:
-            df = pd.read_csv(csv_file)
+            source = CSVRowSource(csv_file)
+            total_rows = len(source)
         except Exception as e:
             messagebox.showerror("CSV Error", f"Failed to read CSV: {e}")
             return
         
-        # Load processing status
-        status = load_processing_status(site_name)
-        
-        # Find unprocessed rows
-        unprocessed_indices = []
-        for idx in range(len(df)):
-            if str(idx) not in status or status[str(idx)].get('status') != 'completed':
-                unprocessed_indices.append(idx)
+        # Find unprocessed rows (index scan over the run store)
+        store = get_run_store(site_name)
+        rows_to_process = store.next_pending(total_rows, row_count)
         
-        if not unprocessed_indices:
+        if not rows_to_process:
             messagebox.showinfo("All Done", "All rows have already been processed!")
             return
         
-        # Limit to requested count
-        rows_to_process = unprocessed_indices[:row_count]
+        unprocessed_count = total_rows - store.completed_count(total_rows)
+        self.log(f"Found {unprocessed_count} unprocessed rows. Processing first {len(rows_to_process)}...")
         
-        self.log(f"Found {len(unprocessed_indices)} unprocessed rows. Processing first {len(rows_to_process)}...")
+        # Parse only the selected rows (indexed by original CSV row number)
+        try:
+            df = source.read_rows(rows_to_process)
+        except Exception as e:
+            messagebox.showerror("CSV Error", f"Failed to read CSV: {e}")
+            return
         
-        # Run workflow with status tracking
-        threading.Thread(target=self._run_partial_thread, args=(config, df, rows_to_process, site_name, headless), daemon=True).start()
+        # Run workflow with status tracking (a usable HTTP fast path needs no browser pool)
+        if workers > 1 and validate_http_template(config, df.columns)[0]:
+            self.log("Compiled HTTP fast path available - running rows over HTTP instead of a browser pool.")
+            workers = 1
+        if workers > 1 and len(rows_to_process) > 1:
+            threading.Thread(target=self._run_partial_pool, args=(config, df, rows_to_process, site_name, workers, resilient), daemon=True).start()
+        else:
+            threading.Thread(target=self._run_partial_thread, args=(config, df, rows_to_process, site_name, headless, resilient), daemon=True).start()
     
-    def _run_partial_thread(self, config, df, row_indices, site_name, headless=False):
-        """Thread to run partial workflow with status tracking."""
+    def _run_partial_thread(self, config, df, row_indices, site_name, headless=False, resilient=False):
+        """Thread to run partial workflow with status tracking.
+        
+        By default the run stops on the first failed row. In resilient mode rows
+        are retried (replacing crashed browsers) and the run only stops when the
+        failure circuit breaker trips.
+        """
         # Create progress window
         progress_win = tk.Toplevel(self.root)
         progress_win.title("Workflow Progress")
@@ -4452,22 +7416,38 @@ class LeadAutomationApp:
             status_text.tag_config(color, foreground=color)
             status_text.see('end')
         
+        # Compiled HTTP fast path (browser is only started if it's unusable or a row fails)
+        fast_path = HttpTemplateSubmitter(config, df.columns)
+        if fast_path.enabled:
+            self.log(f"Using compiled HTTP fast path: POST {fast_path.template['url']}")
+        elif config.get('http_template'):
+            self.log(f"HTTP fast path not used: {fast_path.reason}")
+        
+        # Resolve LLM/research values ahead of the browser
+        prefetcher = RowValuePrefetcher(config, df, row_indices)
+        if not fast_path.enabled:
+            prefetcher.start()
+        
+        def runner_log(msg):
+            progress_win.after(0, lambda m=msg: log_status(m, 'blue'))
+            self.log(msg)
+        
+        # Browser is leased lazily (HTTP fast path may not need it)
+        runner = BrowserRowRunner(config, headless=headless, parent=self.root,
+                                  retries=RESILIENT_ROW_RETRIES if resilient else 0, log_callback=runner_log)
+        breaker = FailureCircuitBreaker()
+        failed_rows = 0
+        
         try:
-            driver = init_driver(headless=headless, parent=self.root)
-            status = load_processing_status(site_name)
-            
-            # Navigate to initial URL
-            initial_url = config.get('url')
-            if initial_url:
-                progress_win.after(0, lambda: log_status(f"Navigating to: {initial_url}", 'blue'))
-                self.log(f"Navigating to: {initial_url}")
-                driver.get(initial_url)
-                time.sleep(2)
+            # Mapped CSV values for the rows of this run in one vectorized pass
+            value_table = build_value_table(config, df.loc[row_indices])
+            if not fast_path.enabled:
+                runner.open()
             
             total_rows = len(row_indices)
             
             for i, row_idx in enumerate(row_indices, 1):
-                row = df.iloc[row_idx]
+                row = df.loc[row_idx]
                 
                 # DIAGNOSTIC: Show what row we're actually processing
                 row_data_preview = {k: str(v)[:30] for k, v in list(row.to_dict().items())[:3]}
@@ -4479,6 +7459,44 @@ class LeadAutomationApp:
                 self.log(f"\n=== Processing Row {row_idx + 1} (CSV Index: {row_idx}) ===")
                 self.log(f"    Row data preview: {row_data_preview}")
                 
+                row_started = time.time()
+                if fast_path.enabled:
+                    try:
+                        response = fast_path.submit(row)
+                        record_row_status(site_name, row_idx, {
+                            'status': 'completed',
+                            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                            'row_number': row_idx + 1,
+                            'duration': time.time() - row_started,
+                            'row_hash': row_hash(row)
+                        })
+                        progress_win.after(0, lambda r=row_idx, c=response.status_code: log_status(f"✓ Row {r + 1} submitted via HTTP ({c})", 'green'))
+                        self.log(f"✓ Row {row_idx + 1} submitted via HTTP fast path ({response.status_code})")
+                        continue
+                    except PossiblySubmittedError as e:
+                        # The POST may have been processed: never replay this row, use the browser from the next one
+                        fast_path.disable(str(e))
+                        error_msg = str(e).split('\n')[0]
+                        record_row_status(site_name, row_idx, {
+                            'status': 'failed',
+                            'error': error_msg,
+                            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                            'row_number': row_idx + 1,
+                            'duration': time.time() - row_started,
+                            'row_hash': row_hash(row)
+                        })
+                        failed_rows += 1
+                        breaker.record(False)
+                        progress_win.after(0, lambda r=row_idx, err=error_msg: log_status(f"✗ Row {r + 1} failed: {err} - switching to browser for later rows", 'red'))
+                        self.log(f"✗ Row {row_idx + 1} failed on HTTP fast path: {error_msg} - falling back to browser for later rows")
+                        prefetcher = RowValuePrefetcher(config, df, row_indices[i:]).start()
+                        continue
+                    except Exception as e:
+                        fast_path.disable(str(e))
+                        progress_win.after(0, lambda err=str(e): log_status(f"HTTP fast path failed ({err}) - switching to browser", 'orange'))
+                        self.log(f"HTTP fast path failed on row {row_idx + 1}: {e} - falling back to browser")
+                        prefetcher = RowValuePrefetcher(config, df, row_indices[i - 1:]).start()
+                
                 try:
                     # Custom callback to update step info
                     def step_callback(step_msg):
@@ -4486,19 +7504,24 @@ class LeadAutomationApp:
                         progress_win.after(0, lambda m=step_msg: log_status(f"  {m}", 'black'))
                         self.log(step_msg)
                     
-                    # Pass session iteration (i=1 for first row, i=2 for second, etc)
-                    replay_workflow_single_row(driver, config, row, log_callback=step_callback, row_idx=row_idx, session_iteration=i)
+                    # Session iteration (login vs. loop start) is tracked by the runner
+                    inferred_values = prefetcher.get(row_idx)
+                    attempts = runner.run_row(row, row_idx, log_callback=step_callback, inferred_values=inferred_values,
+                                              row_values=value_table.get(row_idx))
                     
                     # Mark as completed
-                    status[str(row_idx)] = {
+                    record_row_status(site_name, row_idx, {
                         'status': 'completed',
                         'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                        'row_number': row_idx + 1
-                    }
-                    save_processing_status(site_name, status)
+                        'row_number': row_idx + 1,
+                        'duration': time.time() - row_started,
+                        'row_hash': row_hash(row)
+                    })
+                    breaker.record(True)
                     
-                    progress_win.after(0, lambda r=row_idx: log_status(f"✓ Row {r + 1} completed successfully", 'green'))
-                    self.log(f"✓ Row {row_idx + 1} completed successfully")
+                    retry_note = f" (after {attempts} attempts)" if attempts > 1 else ""
+                    progress_win.after(0, lambda r=row_idx, n=retry_note: log_status(f"✓ Row {r + 1} completed successfully{n}", 'green'))
+                    self.log(f"✓ Row {row_idx + 1} completed successfully{retry_note}")
                     
                 except Exception as e:
                     # Extract meaningful error message
@@ -4507,38 +7530,228 @@ class LeadAutomationApp:
                         error_msg = "Element not found or browser error - check selectors in Verify Workflow"
                     
                     progress_win.after(0, lambda r=row_idx, err=error_msg: log_status(f"✗ Row {r + 1} failed: {err}", 'red'))
-                    progress_win.after(0, lambda: log_status(f"\n❌ STOPPING - First row failed. Fix workflow and try again.", 'red'))
                     self.log(f"✗ Row {row_idx + 1} failed: {error_msg}")
-                    self.log(f"\n❌ STOPPING - Workflow has errors. Please verify workflow again.")
                     
-                    status[str(row_idx)] = {
+                    record_row_status(site_name, row_idx, {
                         'status': 'failed',
                         'error': error_msg,
                         'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                        'row_number': row_idx + 1
-                    }
-                    save_processing_status(site_name, status)
+                        'row_number': row_idx + 1,
+                        'duration': time.time() - row_started,
+                        'row_hash': row_hash(row)
+                    })
+                    failed_rows += 1
+                    
+                    if resilient and not breaker.record(False):
+                        continue  # Keep going; the failed row stays pending for the next run
                     
-                    # STOP on first failure
-                    driver.quit()
+                    if resilient:
+                        progress_win.after(0, lambda: log_status(f"\n❌ STOPPING - circuit breaker tripped: {breaker.reason}", 'red'))
+                        self.log(f"\n❌ STOPPING - circuit breaker tripped: {breaker.reason}. Please verify workflow again.")
+                    else:
+                        progress_win.after(0, lambda: log_status(f"\n❌ STOPPING - First row failed. Fix workflow and try again.", 'red'))
+                        self.log(f"\n❌ STOPPING - Workflow has errors. Please verify workflow again.")
+                    
+                    # STOP (driver is returned to the pool below)
+                    prefetcher.cancel()
                     return
             
             # Final update
             progress_win.after(0, lambda: update_progress("-", "Complete!", total_rows, total_rows))
             progress_win.after(0, lambda: log_status(f"\n=== Processing Complete ===", 'green'))
-            progress_win.after(0, lambda: log_status(f"Processed {total_rows} rows", 'green'))
+            progress_win.after(0, lambda: log_status(f"Processed {total_rows} rows ({failed_rows} failed)", 'green'))
             
             self.log(f"\n=== Partial Processing Complete ===")
-            self.log(f"Processed {len(row_indices)} rows")
-            
-            driver.quit()
+            self.log(f"Processed {len(row_indices)} rows ({failed_rows} failed, {runner.replacements} browser restarts)")
+            for line in llm_usage_summary():
+                self.log(line)
             
         except Exception as e:
             progress_win.after(0, lambda err=e: log_status(f"Error: {err}", 'red'))
             self.log(f"Error in partial workflow: {e}")
-    
+        finally:
+            prefetcher.cancel()
+            runner.close()
+            compact_processing_status(site_name)
+
+    def _run_partial_pool(self, config, df, row_indices, site_name, workers, resilient=False):
+        """Thread to run partial workflow across a pool of headless browsers.
+
+        Row indices are sharded across workers, each with its own driver. Status
+        updates are committed to the site's run store as each row finishes. In
+        resilient mode workers retry rows and share one circuit breaker.
+        """
+        shards = shard_row_indices(row_indices, workers)
+        total_rows = len(row_indices)
+
+        # Create progress window
+        progress_win = tk.Toplevel(self.root)
+        progress_win.title("Workflow Progress (Parallel)")
+        progress_win.geometry("650x500")
+
+        ttk.Label(progress_win, text=f"Workflow Execution Progress - {len(shards)} browsers", font=('Arial', 12, 'bold')).pack(pady=10)
+
+        info_frame = ttk.Frame(progress_win, padding=10)
+        info_frame.pack(fill='x', padx=10)
+
+        progress_label = ttk.Label(info_frame, text=f"Progress: 0/{total_rows} rows", font=('Arial', 10, 'bold'))
+        progress_label.pack(anchor='w')
+
+        failed_label = ttk.Label(info_frame, text="Failed: 0 rows", font=('Arial', 10), foreground='red')
+        failed_label.pack(anchor='w')
+
+        # One status line per worker
+        worker_labels = {}
+        for worker_num, shard in enumerate(shards, 1):
+            lbl = ttk.Label(info_frame, text=f"Worker {worker_num}: waiting ({len(shard)} rows)", font=('Arial', 9))
+            lbl.pack(anchor='w')
+            worker_labels[worker_num] = lbl
+
+        progress_bar = ttk.Progressbar(progress_win, mode='determinate', length=500, maximum=100)
+        progress_bar.pack(pady=10, padx=10)
+
+        log_frame = ttk.Frame(progress_win)
+        log_frame.pack(fill='both', expand=True, padx=10, pady=5)
+
+        status_text = tk.Text(log_frame, height=15, width=70)
+        status_text.pack(fill='both', expand=True)
+        status_scrollbar = ttk.Scrollbar(log_frame, command=status_text.yview)
+        status_scrollbar.pack(side='right', fill='y')
+        status_text.config(yscrollcommand=status_scrollbar.set)
+
+        counts_lock = threading.Lock()
+        stop_event = threading.Event()
+        counts = {'completed': 0, 'failed': 0}
+
+        def update_totals():
+            done = counts['completed'] + counts['failed']
+            progress_label.config(text=f"Progress: {done}/{total_rows} rows")
+            failed_label.config(text=f"Failed: {counts['failed']} rows")
+            progress_bar['value'] = (done / total_rows) * 100
+
+        def update_worker(worker_num, text):
+            worker_labels[worker_num].config(text=f"Worker {worker_num}: {text}")
+
+        def log_status(msg, color='black'):
+            status_text.insert('end', msg + '\n', color)
+            status_text.tag_config(color, foreground=color)
+            status_text.see('end')
+
+        def record_status(row_idx, entry):
+            record_row_status(site_name, row_idx, entry)
+            with counts_lock:
+                if entry['status'] == 'completed':
+                    counts['completed'] += 1
+                else:
+                    counts['failed'] += 1
+            progress_win.after(0, update_totals)
+
+        breaker = FailureCircuitBreaker()
+
+        def worker(worker_num, shard):
+            prefetcher = RowValuePrefetcher(config, df, shard).start()
+            runner = BrowserRowRunner(config, headless=True, parent=self.root,
+                                      retries=RESILIENT_ROW_RETRIES if resilient else 0,
+                                      log_callback=lambda m: self.log(f"[W{worker_num}] {m}"))
+            try:
+                # Mapped CSV values for this worker's rows in one vectorized pass
+                value_table = build_value_table(config, df.loc[shard])
+                progress_win.after(0, lambda: update_worker(worker_num, "starting browser..."))
+                runner.open()
+
+                for i, row_idx in enumerate(shard, 1):
+                    if stop_event.is_set():
+                        progress_win.after(0, lambda: update_worker(worker_num, "stopped"))
+                        return
+
+                    row = df.loc[row_idx]
+                    progress_win.after(0, lambda r=row_idx: update_worker(worker_num, f"Row {r + 1} - starting..."))
+                    self.log(f"[W{worker_num}] === Processing Row {row_idx + 1} (CSV Index: {row_idx}) ===")
+
+                    def step_callback(step_msg, r=row_idx):
+                        progress_win.after(0, lambda s=step_msg: update_worker(worker_num, f"Row {r + 1} - {s}"))
+                        self.log(f"[W{worker_num}] {step_msg}")
+
+                    row_started = time.time()
+                    try:
+                        inferred_values = prefetcher.get(row_idx)
+                        runner.run_row(row, row_idx, log_callback=step_callback, inferred_values=inferred_values,
+                                       row_values=value_table.get(row_idx))
+                        breaker.record(True)
+                        record_status(row_idx, {
+                            'status': 'completed',
+                            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                            'row_number': row_idx + 1,
+                            'worker': worker_num,
+                            'duration': time.time() - row_started,
+                            'row_hash': row_hash(row)
+                        })
+                        progress_win.after(0, lambda r=row_idx: log_status(f"✓ [W{worker_num}] Row {r + 1} completed successfully", 'green'))
+                        self.log(f"[W{worker_num}] ✓ Row {row_idx + 1} completed successfully")
+                    except Exception as e:
+                        error_msg = str(e).split('\n')[0] if str(e) else "Unknown error"
+                        if not error_msg or error_msg == "Message: ":
+                            error_msg = "Element not found or browser error - check selectors in Verify Workflow"
+                        record_status(row_idx, {
+                            'status': 'failed',
+                            'error': error_msg,
+                            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                            'row_number': row_idx + 1,
+                            'worker': worker_num,
+                            'duration': time.time() - row_started,
+                            'row_hash': row_hash(row)
+                        })
+                        progress_win.after(0, lambda r=row_idx, err=error_msg: log_status(f"✗ [W{worker_num}] Row {r + 1} failed: {err}", 'red'))
+                        self.log(f"[W{worker_num}] ✗ Row {row_idx + 1} failed: {error_msg}")
+
+                        if resilient and not breaker.record(False):
+                            continue
+
+                        # STOP all workers on first failure (same policy as single-browser mode),
+                        # or when the resilient-mode circuit breaker trips
+                        stop_event.set()
+                        progress_win.after(0, lambda: update_worker(worker_num, "failed - stopping all workers"))
+                        return
+
+                progress_win.after(0, lambda: update_worker(worker_num, "done"))
+            except Exception as e:
+                stop_event.set()
+                progress_win.after(0, lambda err=e: log_status(f"[W{worker_num}] Error: {err}", 'red'))
+                progress_win.after(0, lambda: update_worker(worker_num, "error"))
+                self.log(f"[W{worker_num}] Error in partial workflow: {e}")
+            finally:
+                prefetcher.cancel()
+                runner.close()
+
+        self.log(f"Sharded {total_rows} rows across {len(shards)} workers: {[len(s) for s in shards]}")
+        threads = [threading.Thread(target=worker, args=(n, shard), daemon=True) for n, shard in enumerate(shards, 1)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        compact_processing_status(site_name)
+
+        not_run = total_rows - counts['completed'] - counts['failed']
+        if stop_event.is_set():
+            stop_reason = f"circuit breaker tripped: {breaker.reason}" if breaker.tripped else "A row failed"
+            progress_win.after(0, lambda: log_status(f"\n❌ STOPPED - {stop_reason}. Fix workflow and try again.", 'red'))
+            self.log(f"\n❌ STOPPING - Workflow has errors ({stop_reason}). Please verify workflow again.")
+            outcome = "Aborted" if breaker.tripped else "Stopped"
+            summary = (f"{outcome}: completed {counts['completed']}, failed {counts['failed']}, "
+                       f"not run {not_run} of {total_rows} rows")
+            progress_win.after(0, lambda: log_status(summary, 'red'))
+            self.log(f"\n=== Parallel Processing {outcome} ===")
+        else:
+            progress_win.after(0, lambda: log_status(f"\n=== Processing Complete ===", 'green'))
+            summary = f"Completed {counts['completed']}, failed {counts['failed']} of {total_rows} rows"
+            progress_win.after(0, lambda: log_status(summary, 'green'))
+            self.log(f"\n=== Parallel Processing Complete ===")
+        self.log(summary)
+        for line in llm_usage_summary():
+            self.log(line)
+
     def on_view_status(self):
-        """View processing status of all rows."""
+        """View processing status: totals plus the first STATUS_VIEW_LIMIT rows, failed rows first."""
         site_name = self.ent_site_name.get().strip()
         csv_file = self.ent_csv.get().strip()
         
@@ -4546,12 +7759,18 @@ class LeadAutomationApp:
             messagebox.showwarning("Missing Info", "Please provide site name.")
             return
         
-        status = load_processing_status(site_name)
+        store = get_run_store(site_name)
+        counts = store.summary()
+        completed = counts.get('completed', 0)
+        failed = counts.get('failed', 0)
         
-        if not status:
+        if not completed and not failed:
             messagebox.showinfo("No Status", "No processing status found. Run partial workflow first.")
             return
         
+        entries = store.rows(('failed',), limit=STATUS_VIEW_LIMIT)
+        entries += store.rows(('completed',), limit=STATUS_VIEW_LIMIT - len(entries))
+        
         # Show status dialog
         status_win = tk.Toplevel(self.root)
         status_win.title("Processing Status")
@@ -4559,15 +7778,17 @@ class LeadAutomationApp:
         
         ttk.Label(status_win, text="Processing Status", font=('Arial', 12, 'bold')).pack(pady=10)
         
-        # Summary
-        completed = len([k for k, v in status.items() if v.get('status') == 'completed'])
-        failed = len([k for k, v in status.items() if v.get('status') == 'failed'])
-        
+        # Summary (trigger-maintained counters)
         summary_frame = ttk.Frame(status_win, padding=10)
         summary_frame.pack(fill='x', padx=10)
         
         ttk.Label(summary_frame, text=f"Completed: {completed}", foreground='green', font=('Arial', 10, 'bold')).pack(side='left', padx=10)
         ttk.Label(summary_frame, text=f"Failed: {failed}", foreground='red', font=('Arial', 10, 'bold')).pack(side='left', padx=10)
+        if counts.get('pending'):
+            ttk.Label(summary_frame, text=f"Pending: {counts['pending']}", foreground='gray', font=('Arial', 10)).pack(side='left', padx=10)
+        if len(entries) < completed + failed:
+            ttk.Label(status_win, text=f"Showing {len(entries)} of {completed + failed} processed rows (failed first)",
+                      foreground='gray', font=('Arial', 9)).pack()
         
         # Status list
         list_frame = ttk.Frame(status_win)
@@ -4585,13 +7806,10 @@ class LeadAutomationApp:
         canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
         canvas.configure(yscrollcommand=scrollbar.set)
         
-        # Sort by row number
-        sorted_status = sorted(status.items(), key=lambda x: int(x[0]))
-        
-        for row_idx, info in sorted_status:
+        for info in entries:
             status_val = info.get('status', 'unknown')
-            timestamp = info.get('timestamp', 'N/A')
-            row_num = info.get('row_number', int(row_idx) + 1)
+            timestamp = info.get('timestamp') or 'N/A'
+            row_num = info['row_number']
             
             status_frame = ttk.Frame(scrollable_frame, relief='solid', borderwidth=1, padding=5)
             status_frame.pack(fill='x', padx=5, pady=2)
@@ -4616,9 +7834,7 @@ class LeadAutomationApp:
         def clear_status():
             response = messagebox.askyesno("Clear Status", "Are you sure you want to clear all processing status? This cannot be undone.")
             if response:
-                status_path = os.path.join('configs', f'{site_name}_processing_status.json')
-                if os.path.exists(status_path):
-                    os.remove(status_path)
+                clear_processing_status(site_name)
                 messagebox.showinfo("Cleared", "Processing status has been cleared.")
                 status_win.destroy()
         
@@ -4673,6 +7889,9 @@ class LeadAutomationApp:
         try:
             save_prefs(self.collect_prefs())
         finally:
+            DRIVER_POOL.shutdown()
+            LLM_CACHE.flush()
+            RESEARCH_CACHE.flush()
             self.root.destroy()
 
 
@@ -0,0 +1,34 @@
+import leadbot
+
+
+def test_next_pending_fills_gaps(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = leadbot.RunStore('gapped')
+    for row_idx in (0, 1, 2, 4):
+        store.record(row_idx, 'completed')
+
+    assert store.next_pending(10, 3) == [3, 5, 6]
+    assert store.completed_count(10) == 4
+    assert store.summary() == {'completed': 4, 'pending': 6}
+
+
+def test_completed_between(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = leadbot.RunStore('ranged')
+    for row_idx, status in ((1, 'completed'), (2, 'failed'), (5, 'completed'), (9, 'completed')):
+        store.record(row_idx, status)
+
+    assert store.completed_between(0, 9) == {1, 5}
+
+
+def test_rows_limit_and_clear(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = leadbot.RunStore('limited')
+    for row_idx in range(5):
+        store.record(row_idx, 'failed' if row_idx % 2 else 'completed')
+
+    assert [e['row_idx'] for e in store.rows(('failed',), limit=1)] == [1]
+    assert [e['row_idx'] for e in store.rows(('completed',), limit=2)] == [0, 2]
+
+    store.clear()
+    assert store.next_pending(3, 5) == [0, 1, 2]